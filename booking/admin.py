@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from .models import Property, Review, Booking
+from .models import Property, Review, Booking, PriceRule
 
 admin.site.register(Property)
 admin.site.register(Review)
 admin.site.register(Booking)
+admin.site.register(PriceRule)
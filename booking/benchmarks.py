@@ -0,0 +1,889 @@
+"""Сценарии для ``manage.py bench``.
+
+Каждый сценарий получает размер нагрузки и возвращает словарь метрик.
+Запускаются на временной тестовой БД, рабочие данные не затрагиваются.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from collections import Counter
+from itertools import product
+from pathlib import Path
+from statistics import median, quantiles
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import Client, RequestFactory, override_settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections
+from django.db import connection, connections
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import renderers, schema
+from core.readers import reader_for
+
+from . import geo, reservations, response_cache, search, seeding
+from .models import Booking, Property, Review
+from .serializers import BookingSerializer, PropertySerializer, ReviewSerializer
+
+User = get_user_model()
+
+SCENARIOS = {}
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def make_owner(username="bench-owner"):
+    user, _ = User.objects.get_or_create(username=username, defaults={"is_owner": True})
+    return user
+
+
+def make_properties(owner, count, **fields):
+    return Property.objects.bulk_create(
+        Property(
+            name=f"Bench property {i}",
+            description="Benchmark",
+            property_type="apartment",
+            address=f"{i} Bench street",
+            city=fields.get("city", "Bench City"),
+            country="Bench Country",
+            owner=owner,
+            price_per_night=100,
+            max_guests=4,
+            bedrooms=2,
+            bathrooms=1,
+        )
+        for i in range(count)
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def booking_payloads(properties, user, count, start):
+    # у каждого жилья ночи идут подряд, поэтому пересечений нет
+    for i in range(count):
+        check_in_date = start + timedelta(days=i // len(properties))
+        yield {
+            "property": properties[i % len(properties)].pk,
+            "user": user.pk,
+            "check_in_date": check_in_date.isoformat(),
+            "check_out_date": (check_in_date + timedelta(days=1)).isoformat(),
+            "guests_count": 2,
+            "total_price": "100.00",
+            "status": "confirmed",
+        }
+
+
+@scenario
+def bulk_import(size):
+    owner = make_owner()
+    properties = make_properties(owner, 50)
+    client = client_for(owner)
+
+    single = list(booking_payloads(properties, owner, size, date(2030, 1, 1)))
+    started = time.perf_counter()
+    for payload in single:
+        response = client.post("/api/v1/bookings/", payload, format="json")
+        assert response.status_code == 201, response.data
+    single_elapsed = time.perf_counter() - started
+
+    bulk = list(booking_payloads(properties, owner, size, date(2040, 1, 1)))
+    started = time.perf_counter()
+    for offset in range(0, size, 1000):
+        response = client.post(
+            "/api/v1/bookings/bulk/", bulk[offset : offset + 1000], format="json"
+        )
+        assert response.status_code == 201, response.data
+    bulk_elapsed = time.perf_counter() - started
+
+    return {
+        "rows": size,
+        "single_rows_per_sec": round(size / single_elapsed),
+        "bulk_rows_per_sec": round(size / bulk_elapsed),
+        "speedup": round(single_elapsed / bulk_elapsed, 1),
+    }
+
+
+@scenario
+def reserve(size):
+    owner = make_owner()
+    contended, *properties = make_properties(owner, size + 1)
+
+    def booking(property, check_in_date):
+        return Booking(
+            property=property,
+            user=owner,
+            check_in_date=check_in_date,
+            check_out_date=check_in_date + timedelta(days=3),
+            guests_count=1,
+            total_price=300,
+            status="confirmed",
+        )
+
+    # все потоки бьются за одни и те же ночи одного объекта
+    barrier = threading.Barrier(size)
+    wins = []
+
+    def attempt(offset):
+        barrier.wait()
+        try:
+            reservations.save_booking(
+                booking(contended, date(2030, 1, 1) + timedelta(days=offset % 3))
+            )
+            wins.append(offset)
+        except reservations.BookingConflict:
+            pass
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=attempt, args=(i,)) for i in range(size)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    contended_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for property in properties:
+        reservations.save_booking(booking(property, date(2030, 1, 1)))
+    uncontended_elapsed = time.perf_counter() - started
+
+    return {
+        "contended_attempts": size,
+        "contended_wins": len(wins),
+        "contended_attempts_per_sec": round(size / contended_elapsed),
+        "uncontended_bookings_per_sec": round(size / uncontended_elapsed),
+    }
+
+
+def write_bookings(properties, user, writer, count, start):
+    """Поток-«воркер»: каждая бронь — отдельный запрос с его границами."""
+    latencies = []
+    locked = 0
+    for i in range(count):
+        close_old_connections()
+        check_in_date = start + timedelta(days=(writer * count + i) * 2)
+        booking = Booking(
+            property=random.choice(properties),
+            user=user,
+            check_in_date=check_in_date,
+            check_out_date=check_in_date + timedelta(days=1),
+            guests_count=1,
+            total_price=100,
+            status="confirmed",
+        )
+        request_started = time.perf_counter()
+        try:
+            reservations.save_booking(booking)
+        except OperationalError:
+            locked += 1
+        else:
+            latencies.append(time.perf_counter() - request_started)
+        close_old_connections()
+    connection.close()
+    return latencies, locked
+
+
+@scenario
+def concurrent_writes(size, writers=8):
+    if connection.vendor != "sqlite":
+        return {"skipped": connection.vendor}
+    owner = make_owner()
+    properties = make_properties(owner, 50)
+    count = max(size // writers, 1)
+    configured = connections.settings[DEFAULT_DB_ALIAS]
+    profiles = {
+        # настройки Django по умолчанию: rollback-журнал, DEFERRED,
+        # соединение на каждый запрос
+        "default": {**configured, "OPTIONS": {}, "CONN_MAX_AGE": 0},
+        "tuned": configured,
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, settings_dict in profiles.items():
+            path = Path(directory) / f"{name}.sqlite3"
+            with sqlite3.connect(path) as target:
+                connection.connection.backup(target)
+            # потоки пула открывают свои соединения уже с этими настройками
+            connections.settings[DEFAULT_DB_ALIAS] = {**settings_dict, "NAME": path}
+            try:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(writers) as pool:
+                    outcomes = list(
+                        pool.map(
+                            lambda writer: write_bookings(
+                                properties, owner, writer, count, date(2031, 1, 1)
+                            ),
+                            range(writers),
+                        )
+                    )
+                elapsed = time.perf_counter() - started
+            finally:
+                connections.settings[DEFAULT_DB_ALIAS] = configured
+            latencies = [latency for outcome in outcomes for latency in outcome[0]]
+            results[name] = {
+                "writers": writers,
+                "attempts": writers * count,
+                "locked_errors": sum(outcome[1] for outcome in outcomes),
+                **latency_metrics("write", latencies, elapsed),
+            }
+    return results
+
+
+def cpu_ms(build, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        build()
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 1)
+
+
+@scenario
+def list_serialization(size):
+    seeding.seed(
+        users=max(size // 100, 10),
+        properties=size,
+        bookings=size,
+        reviews=size,
+        seed=size,
+    )
+    cases = {
+        "properties": (Property.objects.with_average_rating(), PropertySerializer),
+        "bookings": (Booking.objects.all(), BookingSerializer),
+        "reviews": (Review.objects.all(), ReviewSerializer),
+    }
+    results = {}
+    for name, (queryset, serializer_class) in cases.items():
+        queryset = queryset.order_by("-created_at", "-id")[:size]
+        reader = reader_for(serializer_class)
+        instances = list(queryset)
+        rows = list(queryset.values(*reader.columns))
+        fetch_instances_ms = cpu_ms(lambda: list(queryset))
+        fetch_values_ms = cpu_ms(lambda: list(queryset.values(*reader.columns)))
+        serializer_ms = cpu_ms(lambda: serializer_class(instances, many=True).data)
+        reader_ms = cpu_ms(lambda: [reader.read(row) for row in rows])
+        results[name] = {
+            "rows": len(rows),
+            "serializer_cpu_ms": serializer_ms,
+            "reader_cpu_ms": reader_ms,
+            "serialize_speedup": round(serializer_ms / reader_ms, 1),
+            # вместе с чтением из БД: объекты против values()
+            "end_to_end_speedup": round(
+                (fetch_instances_ms + serializer_ms) / (fetch_values_ms + reader_ms), 1
+            ),
+        }
+    return results
+
+
+@scenario
+def render(size, rows=10_000):
+    seeding.seed(
+        users=max(size // 100, 10),
+        properties=size,
+        bookings=size,
+        reviews=size,
+        seed=size,
+    )
+    cases = {
+        "properties": (Property.objects.with_average_rating(), PropertySerializer),
+        "bookings": (Booking.objects.all(), BookingSerializer),
+    }
+    candidates = {
+        "drf": JSONRenderer(),
+        "orjson": renderers.ORJSONRenderer() if renderers.orjson else None,
+        "msgpack": renderers.MessagePackRenderer() if renderers.msgpack else None,
+    }
+    results = {}
+    for name, (queryset, serializer_class) in cases.items():
+        data = serializer_class(queryset[:size], many=True).data
+        # время на 10k строк ответа независимо от размера выборки
+        data = (data * (rows // len(data) + 1))[:rows]
+        expected = JSONRenderer().render(data)
+        result = {}
+        for label, renderer in candidates.items():
+            if renderer is None:
+                result[label] = "not installed"
+                continue
+            body = renderer.render(data)
+            if label == "orjson":
+                result["orjson_identical"] = body == expected
+            result[f"{label}_ms"] = cpu_ms(lambda: renderer.render(data))
+            result[f"{label}_bytes"] = len(body)
+        if "orjson_ms" in result:
+            result["orjson_speedup"] = round(result["drf_ms"] / result["orjson_ms"], 1)
+        results[name] = result
+    return results
+
+
+def server_timing(response, name):
+    for entry in response["Server-Timing"].split(", "):
+        metric, duration = entry.split(";")[:2]
+        if metric == name:
+            return float(duration.removeprefix("dur="))
+    return 0.0
+
+
+@scenario
+def sparse_fields(size, requests=100):
+    seeding.seed(
+        users=max(size // 10, 10),
+        properties=size,
+        bookings=size * 2,
+        reviews=size,
+        seed=size,
+    )
+    # описания объявлений обычно длинные
+    Property.objects.update(description="Описание объекта. " * 200)
+    client = client_for(make_owner())
+    variants = {
+        "properties_full": ("/api/v1/properties/", {}),
+        "properties_mobile": (
+            "/api/v1/properties/",
+            {"fields": "id,name,city,price_per_night,average_rating"},
+        ),
+        "bookings_full": ("/api/v1/bookings/", {}),
+        "bookings_dates": (
+            "/api/v1/bookings/",
+            {"fields": "id,property,check_in_date,check_out_date,status"},
+        ),
+        "reviews_full": ("/api/v1/reviews/", {}),
+        "reviews_ratings": ("/api/v1/reviews/", {"omit": "comment"}),
+    }
+    results = {}
+    for name, (url, params) in variants.items():
+        params = {**params, "page_size": 500}
+        sizes, db_ms, latencies = [], [], []
+        for _ in range(requests):
+            # без кэша ответов жилья: меряем чтение из БД
+            response_cache.invalidate([])
+            started = time.perf_counter()
+            response = client.get(url, params)
+            latencies.append(time.perf_counter() - started)
+            sizes.append(len(response.content))
+            db_ms.append(server_timing(response, "db"))
+        results[name] = {
+            "payload_bytes": sizes[-1],
+            "db_ms_avg": round(sum(db_ms) / len(db_ms), 2),
+            "p50_ms": round(quantiles(latencies, n=100)[49] * 1000, 2),
+        }
+    return results
+
+
+@scenario
+def geo_search(size):
+    owner = make_owner()
+    properties = make_properties(owner, size)
+    # точки в квадрате ~200 x 200 км
+    rng = random.Random(size)
+    for property in properties:
+        property.latitude = 55 + rng.random() * 1.8
+        property.longitude = 37 + rng.random() * 3.2
+        property.update_geohash()
+    Property.objects.bulk_update(
+        properties, ["latitude", "longitude", "geohash"], batch_size=1000
+    )
+    client = client_for(owner)
+    centers = [
+        (55.2 + rng.random() * 1.4, 37.3 + rng.random() * 2.6) for _ in range(50)
+    ]
+
+    started = time.perf_counter()
+    for lat, lon in centers:
+        response = client.get(
+            "/api/v1/properties/nearby/", {"lat": lat, "lon": lon, "radius_km": 5}
+        )
+        assert response.status_code == 200, response.data
+    indexed_elapsed = time.perf_counter() - started
+
+    # без индекса: все координаты из БД и расстояние до каждой точки
+    started = time.perf_counter()
+    for lat, lon in centers:
+        rows = Property.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).values_list("pk", "latitude", "longitude")
+        sorted(
+            (geo.distance_km(lat, lon, latitude, longitude), pk)
+            for pk, latitude, longitude in rows
+        )
+    scan_elapsed = time.perf_counter() - started
+
+    return {
+        "properties": size,
+        "nearby_ms": round(indexed_elapsed / len(centers) * 1000, 2),
+        "full_scan_ms": round(scan_elapsed / len(centers) * 1000, 2),
+        "speedup": round(scan_elapsed / indexed_elapsed, 1),
+    }
+
+
+SYLLABLES = "ka lo mi ra su te vo ne da pi gu ze ro ba fi ly".split()
+
+
+@scenario
+def text_search(size):
+    owner = make_owner()
+    rng = random.Random(size)
+    # словарь из ~4000 слов: каждое встречается примерно в 1% описаний
+    words = ["".join(syllables) for syllables in product(SYLLABLES, repeat=3)]
+    Property.objects.bulk_create(
+        (
+            Property(
+                name=" ".join(rng.choices(words, k=3)).capitalize(),
+                description=" ".join(rng.choices(words, k=40)),
+                property_type="apartment",
+                address=f"{i} {rng.choice(words)} street",
+                city=rng.choice(("Moscow", "Kazan", "Sochi", "Tver")),
+                country="Bench Country",
+                owner=owner,
+                price_per_night=100,
+                max_guests=4,
+                bedrooms=2,
+                bathrooms=1,
+            )
+            for i in range(size)
+        ),
+        batch_size=1000,
+    )
+    queries = [rng.choice(words) for _ in range(10)] + [
+        " ".join(rng.sample(words, 2)) for _ in range(10)
+    ]
+
+    def icontains(query):
+        condition = Q()
+        for word in query.split():
+            condition &= Q.create(
+                [(f"{field}__icontains", word) for field in search.FIELDS],
+                connector=Q.OR,
+            )
+        return Property.objects.filter(condition).order_by("-created_at", "-id")
+
+    def fulltext(query):
+        return search.search(Property.objects.all(), query).order_by(
+            "search_rank", "-id"
+        )
+
+    timings = {}
+    for name, build in (("icontains", icontains), ("fulltext", fulltext)):
+        started = time.perf_counter()
+        for query in queries:
+            list(build(query).values_list("pk", flat=True)[:50])
+        timings[name] = (time.perf_counter() - started) / len(queries)
+
+    client = client_for(owner)
+    started = time.perf_counter()
+    for query in queries:
+        response = client.get("/api/v1/properties/", {"q": query})
+        assert response.status_code == 200, response.data
+    endpoint = (time.perf_counter() - started) / len(queries)
+
+    return {
+        "properties": size,
+        "backend": search.backend(connection),
+        "icontains_ms": round(timings["icontains"] * 1000, 2),
+        "fulltext_ms": round(timings["fulltext"] * 1000, 2),
+        "speedup": round(timings["icontains"] / timings["fulltext"], 1),
+        "endpoint_ms": round(endpoint * 1000, 2),
+    }
+
+
+def hot_requests(properties, count):
+    """Смесь горячих GET: список, карточка, доступность, отзывы."""
+    for i in range(count):
+        pk = properties[i % len(properties)].pk
+        yield [
+            ("/api/v1/properties/", "page_size=20"),
+            (f"/api/v1/properties/{pk}/", ""),
+            (
+                f"/api/v1/properties/{pk}/availability/",
+                "start_date=2030-01-01&end_date=2030-01-05",
+            ),
+            ("/api/v1/reviews/", "page_size=20"),
+        ][i % 4]
+
+
+def latency_metrics(prefix, latencies, elapsed):
+    return {
+        f"{prefix}_rps": round(len(latencies) / elapsed),
+        f"{prefix}_p50_ms": round(quantiles(latencies, n=100)[49] * 1000, 2),
+        f"{prefix}_p99_ms": round(quantiles(latencies, n=100)[98] * 1000, 2),
+    }
+
+
+def run_wsgi(requests, cookie, concurrency):
+    application = WSGIHandler()
+    base = RequestFactory()._base_environ(HTTP_COOKIE=cookie)
+
+    def call(request):
+        path, query = request
+        started = time.perf_counter()
+        environ = {**base, "PATH_INFO": path, "QUERY_STRING": query}
+        statuses = []
+        body = b"".join(
+            application(environ, lambda status, headers: statuses.append(status))
+        )
+        assert statuses[0].startswith("200"), (statuses, body)
+        return time.perf_counter() - started
+
+    # как многопоточный WSGI-сервер: поток на одновременный запрос
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, requests))
+    return latencies, time.perf_counter() - started
+
+
+def run_asgi(requests, cookie, concurrency, async_views):
+    from core.asgi import APIASGIHandler
+
+    async def call(request, slots):
+        path, query = request
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        done = asyncio.Event()
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        statuses = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+            elif not message.get("more_body"):
+                done.set()
+
+        async with slots:
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            assert statuses == [200], (request, statuses)
+            return time.perf_counter() - started
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(call(request, slots) for request in requests)
+        )
+        return latencies, time.perf_counter() - started
+
+    # middleware обработчик выбирает при создании, маршруты — на каждый запрос
+    with override_settings(ASYNC_VIEWS=async_views):
+        application = APIASGIHandler()
+        return asyncio.run(main())
+
+
+@scenario
+def asgi(size, concurrency=64):
+    owner = make_owner()
+    properties = make_properties(owner, 200)
+    Review.objects.bulk_create(
+        Review(property=property, user=owner, rating=5, comment="Bench")
+        for property in properties
+    )
+    client = Client()
+    client.force_login(owner)
+    cookie = f"sessionid={client.cookies['sessionid'].value}"
+    requests = list(hot_requests(properties, size))
+
+    wsgi_latencies, wsgi_elapsed = run_wsgi(requests, cookie, concurrency)
+    asgi_latencies, asgi_elapsed = run_asgi(requests, cookie, concurrency, False)
+    async_latencies, async_elapsed = run_asgi(requests, cookie, concurrency, True)
+    return {
+        "requests": size,
+        "concurrency": concurrency,
+        **latency_metrics("wsgi", wsgi_latencies, wsgi_elapsed),
+        **latency_metrics("asgi", asgi_latencies, asgi_elapsed),
+        # ASYNC_VIEWS=1: горячие GET в цикле событий (core.async_views)
+        **latency_metrics("asgi_async", async_latencies, async_elapsed),
+    }
+
+
+@scenario
+def openapi_schema(size, requests=200):
+    # от объёма данных схема не зависит, size не используется
+    factory = RequestFactory()
+
+    def timings(view, count, **headers):
+        latencies = []
+        for _ in range(count):
+            request = factory.get("/api/schema/", **headers)
+            started = time.perf_counter()
+            response = view(request)
+            if hasattr(response, "render"):
+                response.render()
+            latencies.append(time.perf_counter() - started)
+        return latencies, response
+
+    results = {}
+    latencies, response = timings(SpectacularAPIView.as_view(), 10)
+    results["spectacular"] = {
+        "p50_ms": round(quantiles(latencies, n=100)[49] * 1000, 2),
+        "bytes": len(response.content),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        with override_settings(SCHEMA_DIR=directory):
+            schema._loaded.clear()
+            view = schema.CachedSchemaView.as_view()
+            cold, _ = timings(view, 1)
+            schema._loaded.clear()
+            from_file, _ = timings(view, 1)
+            latencies, response = timings(view, requests)
+            gzip_latencies, gzipped = timings(
+                view, requests, HTTP_ACCEPT_ENCODING="gzip"
+            )
+            schema._loaded.clear()
+    results["cached"] = {
+        "build_ms": round(cold[0] * 1000, 1),
+        "load_ms": round(from_file[0] * 1000, 1),
+        "p50_us": round(quantiles(latencies, n=100)[49] * 1e6, 1),
+        "gzip_p50_us": round(quantiles(gzip_latencies, n=100)[49] * 1e6, 1),
+        "bytes": len(response.content),
+        "gzip_bytes": len(gzipped.content),
+    }
+    return results
+
+
+def endpoint_metrics(client, make_request, count):
+    """Прогоняет запрос count раз; make_request(i) -> (метод, url, данные)."""
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+    for i in range(count):
+        method, url, data = make_request(i)
+        request_started = time.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            if method == "post":
+                response = client.post(url, data, format="json")
+            else:
+                response = client.get(url, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        latencies.append(time.perf_counter() - request_started)
+        queries.append(len(captured))
+        assert response.status_code == 200, (url, response.status_code)
+    elapsed = time.perf_counter() - started
+    percentiles = quantiles(latencies, n=100)
+    return {
+        "requests": count,
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1000, 2),
+        "p95_ms": round(percentiles[94] * 1000, 2),
+        "p99_ms": round(percentiles[98] * 1000, 2),
+        "queries_avg": round(sum(queries) / count, 2),
+        "queries_max": max(queries),
+    }
+
+
+@scenario
+def endpoints(size, requests=200):
+    seeding.seed(
+        users=max(size // 10, 20),
+        properties=size,
+        bookings=size * 5,
+        reviews=size * 3 // 2,
+        seed=size,
+    )
+    admin = User.objects.create_superuser("bench-admin", password="bench")
+    # хозяин с наибольшим числом объектов — самый тяжёлый для своих списков
+    owner = max(
+        User.objects.filter(is_owner=True), key=lambda user: user.properties.count()
+    )
+    property_ids = list(Property.objects.values_list("pk", flat=True))
+    booking_ids = list(Booking.objects.values_list("pk", flat=True)[:requests])
+    review_ids = list(Review.objects.values_list("pk", flat=True)[:requests])
+    user_ids = list(User.objects.values_list("pk", flat=True)[:requests])
+    cities = seeding.CITIES
+    start = seeding.START_DATE + timedelta(days=120)
+
+    def pick(ids, i):
+        return ids[i * 7919 % len(ids)]
+
+    def stays(i):
+        return [
+            {
+                "property": pick(property_ids, i * 20 + j),
+                "check_in_date": (start + timedelta(days=j)).isoformat(),
+                "check_out_date": (start + timedelta(days=j + 3)).isoformat(),
+            }
+            for j in range(20)
+        ]
+
+    window = {
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=7)).isoformat(),
+    }
+    plan = {
+        "properties_list": lambda i: ("get", "/api/v1/properties/", {}),
+        "properties_filter": lambda i: (
+            "get",
+            "/api/v1/properties/",
+            {"city": cities[i % len(cities)][0], "max_price": 5000 + i % 50 * 100},
+        ),
+        "properties_search": lambda i: (
+            "get",
+            "/api/v1/properties/",
+            {"q": seeding.FEATURES[i % len(seeding.FEATURES)]},
+        ),
+        "properties_nearby": lambda i: (
+            "get",
+            "/api/v1/properties/nearby/",
+            {
+                "lat": cities[i % len(cities)][2],
+                "lon": cities[i % len(cities)][3],
+                "radius_km": 5,
+            },
+        ),
+        "properties_availability_bulk": lambda i: (
+            "get",
+            "/api/v1/properties/availability/",
+            {**window, "city": cities[i % len(cities)][0]},
+        ),
+        "properties_quote": lambda i: ("post", "/api/v1/properties/quote/", stays(i)),
+        "property_detail": lambda i: (
+            "get",
+            f"/api/v1/properties/{pick(property_ids, i)}/",
+            {},
+        ),
+        "property_availability": lambda i: (
+            "get",
+            f"/api/v1/properties/{pick(property_ids, i)}/availability/",
+            window,
+        ),
+        "property_calendar": lambda i: (
+            "get",
+            f"/api/v1/properties/{pick(property_ids, i)}/calendar/",
+            {
+                "from": seeding.START_DATE.isoformat(),
+                "to": (start + timedelta(days=365)).isoformat(),
+            },
+        ),
+        "bookings_list": lambda i: ("get", "/api/v1/bookings/", {}),
+        "booking_detail": lambda i: (
+            "get",
+            f"/api/v1/bookings/{pick(booking_ids, i)}/",
+            {},
+        ),
+        "bookings_export": lambda i: ("get", "/api/v1/bookings/export/", {}),
+        "reviews_list": lambda i: ("get", "/api/v1/reviews/", {}),
+        "review_detail": lambda i: (
+            "get",
+            f"/api/v1/reviews/{pick(review_ids, i)}/",
+            {},
+        ),
+        "users_list": lambda i: ("get", "/api/v1/users/", {}),
+        "user_detail": lambda i: ("get", f"/api/v1/users/{pick(user_ids, i)}/", {}),
+    }
+    clients = {"bookings_export": client_for(owner)}
+    return {
+        name: endpoint_metrics(
+            clients.get(name) or client_for(admin), make_request, requests
+        )
+        for name, make_request in plan.items()
+    }
+
+
+STARTUP_PROFILES = {"full": "core.settings", "api": "core.settings_api"}
+
+
+def probe(settings_module, entry, path, database, importtime=False):
+    """Запуск booking.startup_probe в новом процессе: (метрики, stderr)."""
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings_module,
+        "SQLITE_PATH": str(database),
+    }
+    command = [sys.executable, "-m", "booking.startup_probe", entry, path]
+    if importtime:
+        command[1:1] = ["-X", "importtime"]
+    started = time.perf_counter()
+    completed = subprocess.run(
+        command,
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.splitlines()[-1])
+    result["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result, completed.stderr
+
+
+def import_self_times(stderr, top=10):
+    """Собственное время импорта по пакетам верхнего уровня, мс."""
+    totals = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, _, module = line[len("import time:") :].split("|")
+        totals[module.strip().split(".")[0]] += int(own)
+    return {package: round(us / 1000, 1) for package, us in totals.most_common(top)}
+
+
+@scenario
+def startup(size, runs=5):
+    if connection.vendor != "sqlite":
+        return {"skipped": connection.vendor}
+    make_properties(make_owner(), size)
+    path = "/api/v1/properties/"
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / "startup.sqlite3"
+        with sqlite3.connect(database) as target:
+            connection.connection.backup(target)
+        for (profile, settings_module), entry in product(
+            STARTUP_PROFILES.items(), ("wsgi", "asgi")
+        ):
+            samples = [
+                probe(settings_module, entry, path, database)[0] for _ in range(runs)
+            ]
+            assert all(sample["status"] == 200 for sample in samples), samples
+            results[f"{profile}_{entry}"] = {
+                "runs": runs,
+                "modules": samples[-1]["modules"],
+                **{
+                    key: round(median(sample[key] for sample in samples), 1)
+                    for key in ("import_ms", "first_response_ms", "process_ms")
+                },
+            }
+        # -X importtime замедляет импорт, поэтому отдельный прогон
+        for profile, settings_module in STARTUP_PROFILES.items():
+            _, stderr = probe(settings_module, "wsgi", path, database, importtime=True)
+            results[f"{profile}_imports"] = import_self_times(stderr)
+    return results
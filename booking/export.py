@@ -0,0 +1,41 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class _Echo:
+    # csv.writer пишет строку сюда и сразу получает её обратно
+    def write(self, value):
+        return value
+
+
+def _ndjson_rows(serializer, queryset):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for obj in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield encoder.encode(serializer.to_representation(obj)) + "\n"
+
+
+def _csv_rows(serializer, queryset):
+    writer = csv.writer(_Echo())
+    header = [name for name, field in serializer.fields.items() if not field.write_only]
+    yield writer.writerow(header)
+    for obj in queryset.iterator(chunk_size=CHUNK_SIZE):
+        data = serializer.to_representation(obj)
+        yield writer.writerow([data[name] for name in header])
+
+
+def stream_export(serializer, queryset, file_format, filename):
+    """Построчная выгрузка: в памяти держится только текущая пачка строк."""
+    rows = _csv_rows if file_format == "csv" else _ndjson_rows
+    response = StreamingHttpResponse(
+        rows(serializer, queryset), content_type=FORMATS[file_format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
@@ -0,0 +1,96 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from . import geo, search
+from .models import Property
+
+
+class PropertyFilterSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, required=False)
+    city = serializers.CharField(required=False)
+    country = serializers.CharField(required=False)
+    property_type = serializers.ChoiceField(
+        choices=Property.PROPERTY_TYPES, required=False
+    )
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    guests = serializers.IntegerField(min_value=1, required=False)
+    bedrooms = serializers.IntegerField(min_value=0, required=False)
+    check_in = serializers.DateField(required=False)
+    check_out = serializers.DateField(required=False)
+    min_lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    max_lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    min_lon = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    max_lon = serializers.FloatField(min_value=-180, max_value=180, required=False)
+
+    BBOX = ("min_lat", "min_lon", "max_lat", "max_lon")
+
+    def validate(self, data):
+        if ("check_in" in data) != ("check_out" in data):
+            raise serializers.ValidationError(
+                "Даты check_in и check_out указываются вместе."
+            )
+        if "check_in" in data and data["check_in"] >= data["check_out"]:
+            raise serializers.ValidationError(
+                "Дата заезда должна предшествовать дате выезда."
+            )
+        bbox = [name for name in self.BBOX if name in data]
+        if bbox and len(bbox) != len(self.BBOX):
+            raise serializers.ValidationError(
+                "Границы min_lat, max_lat, min_lon, max_lon указываются вместе."
+            )
+        if bbox and (
+            data["min_lat"] > data["max_lat"] or data["min_lon"] > data["max_lon"]
+        ):
+            raise serializers.ValidationError("Неверно заданы границы области.")
+        return data
+
+
+class PropertyFilterBackend(BaseFilterBackend):
+    # параметр запроса -> условие, каждое покрыто индексом Property
+    lookups = {
+        "city": "city",
+        "country": "country",
+        "property_type": "property_type",
+        "min_price": "price_per_night__gte",
+        "max_price": "price_per_night__lte",
+        "guests": "max_guests__gte",
+        "bedrooms": "bedrooms__gte",
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = PropertyFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        queryset = queryset.filter(
+            **{
+                lookup: data[param]
+                for param, lookup in self.lookups.items()
+                if param in data
+            }
+        )
+        if "check_in" in data:
+            queryset = queryset.available(data["check_in"], data["check_out"])
+        if "min_lat" in data:
+            queryset = queryset.filter(
+                geo.bbox_filter(*(data[name] for name in params.BBOX))
+            )
+        if "q" in data:
+            queryset = search.search(queryset, data["q"])
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "string"},
+            }
+            for name in PropertyFilterSerializer().fields
+        ]
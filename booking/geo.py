@@ -0,0 +1,129 @@
+"""Геохеш и грубая фильтрация по ячейкам без PostGIS.
+
+Ячейки геохеша одной точности образуют сетку, а все точки ячейки имеют
+общий префикс хеша. Поэтому «все объекты в ячейке» — это диапазон
+geohash >= prefix AND geohash < prefix + "{", который обслуживается
+обычным B-tree индексом в SQLite и PostgreSQL.
+"""
+
+import math
+
+from django.db.models import Q
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_CELLS = 32
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Размер ячейки (градусы широты, градусы долготы)."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def cells_for_bbox(min_lat, min_lon, max_lat, max_lon):
+    """Префиксы ячеек, покрывающих прямоугольник, — не больше MAX_CELLS."""
+    for precision in range(PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+        cols = math.floor(max_lon / lon_step) - math.floor(min_lon / lon_step) + 1
+        if rows * cols <= MAX_CELLS:
+            break
+    cells = set()
+    for row in range(rows):
+        latitude = min(min_lat + row * lat_step, max_lat)
+        for col in range(cols):
+            longitude = min(min_lon + col * lon_step, max_lon)
+            cells.add(encode(latitude, longitude, precision))
+    return sorted(cells)
+
+
+def cells_filter(cells):
+    condition = Q()
+    for cell in cells:
+        condition |= Q(geohash__gte=cell, geohash__lt=cell + "{")
+    return condition
+
+
+def bbox_filter(min_lat, min_lon, max_lat, max_lon):
+    """Ячейки по индексу плюс точная проверка координат."""
+    return cells_filter(cells_for_bbox(min_lat, min_lon, max_lat, max_lon)) & Q(
+        latitude__gte=min_lat,
+        latitude__lte=max_lat,
+        longitude__gte=min_lon,
+        longitude__lte=max_lon,
+    )
+
+
+def radius_bboxes(latitude, longitude, radius_km):
+    """Прямоугольники (min_lat, min_lon, max_lat, max_lon), покрывающие круг.
+
+    Круг через антимеридиан покрывают два прямоугольника по разные его
+    стороны, круг с полюсом — полоса всех долгот.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    min_lat = latitude - math.degrees(angle)
+    max_lat = latitude + math.degrees(angle)
+    cos_lat = math.cos(math.radians(latitude))
+    if min_lat <= -90.0 or max_lat >= 90.0 or math.sin(angle) >= cos_lat:
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+    # наибольшее отклонение долготы на окружности, а не на широте центра
+    lon_delta = math.degrees(math.asin(math.sin(angle) / cos_lat))
+    min_lon, max_lon = longitude - lon_delta, longitude + lon_delta
+    if min_lon < -180.0:
+        return [
+            (min_lat, min_lon + 360.0, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lon),
+        ]
+    if max_lon > 180.0:
+        return [
+            (min_lat, min_lon, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lon - 360.0),
+        ]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def radius_filter(latitude, longitude, radius_km):
+    condition = Q()
+    for bbox in radius_bboxes(latitude, longitude, radius_km):
+        condition |= bbox_filter(*bbox)
+    return condition
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,84 @@
+import json
+import platform
+import traceback
+
+import django
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from booking.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = "Запускает сценарии нагрузочного тестирования на временной БД."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenarios", nargs="*", help=f"Сценарии: {', '.join(sorted(SCENARIOS))}"
+        )
+        parser.add_argument("--size", type=int, default=1000)
+        parser.add_argument(
+            "--output", help="JSON-файл с результатами для сравнения между релизами"
+        )
+
+    def handle(self, *args, **options):
+        names = options["scenarios"] or sorted(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results, failed = self.run_scenarios(names, options["size"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            report = {
+                "size": options["size"],
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "scenarios": results,
+            }
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+        if failed:
+            raise CommandError(f"Сценарии с ошибкой: {', '.join(failed)}")
+
+    def run_scenarios(self, names, size):
+        """Результаты по сценариям и список упавших; ошибка не прерывает прогон."""
+        results = {}
+        failed = []
+        for name in names:
+            # каждый сценарий начинает с пустой БД и пустых кэшей: данные
+            # предыдущих не влияют ни на замеры, ни на ход сценария
+            call_command("flush", interactive=False, verbosity=0)
+            for cache in caches.all():
+                cache.clear()
+            try:
+                results[name] = SCENARIOS[name](size)
+            except Exception as exc:
+                failed.append(name)
+                results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+                self.stderr.write(f"{name}:\n{traceback.format_exc()}")
+            self.write_result(name, results[name])
+        return results, failed
+
+    def write_result(self, name, result):
+        # вложенные словари — отдельная строка на каждый эндпоинт
+        if all(isinstance(value, dict) for value in result.values()):
+            for key, value in result.items():
+                self.write_result(f"{name}.{key}", value)
+            return
+        metrics = " ".join(f"{key}={value}" for key, value in result.items())
+        self.stdout.write(f"{name}: {metrics}")
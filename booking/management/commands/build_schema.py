@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    help = "Строит схему OpenAPI для /api/schema/ и сохраняет её в SCHEMA_DIR."
+
+    def handle(self, *args, **options):
+        version = schema.schema_version()
+        for file_format, body in schema.build(version).items():
+            self.stdout.write(f"{schema._path(version, file_format)}: {len(body)} байт")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = "Выдаёт подписанное значение заголовка X-Profile для профилирования запроса."
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.make_token())
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from booking import search
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс жилья."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        kind = search.rebuild(connections[options["database"]])
+        if kind is None:
+            self.stdout.write(
+                "Полнотекстовый индекс не поддерживается, используется icontains."
+            )
+        else:
+            self.stdout.write(f"Индекс перестроен ({kind}).")
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking.seeding import seed
+
+
+class Command(BaseCommand):
+    help = "Заполняет БД синтетическими пользователями, жильём, бронями и отзывами."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--properties", type=int, default=2000)
+        parser.add_argument("--bookings", type=int, default=10000)
+        parser.add_argument("--reviews", type=int, default=3000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = seed(
+            users=options["users"],
+            properties=options["properties"],
+            bookings=options["bookings"],
+            reviews=options["reviews"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        counts = " ".join(f"{model}={count}" for model, count in created.items())
+        self.stdout.write(f"{counts} за {time.perf_counter() - started:.1f} с")
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:37
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    Property = apps.get_model("booking", "Property")
+    Review = apps.get_model("booking", "Review")
+    totals = Review.objects.values("property").annotate(
+        total=Sum("rating"), count=Count("pk")
+    )
+    for row in totals.iterator():
+        Property.objects.filter(pk=row["property"]).update(
+            rating_sum=row["total"], rating_count=row["count"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0002_property_rating_aggregates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["property", "status", "check_in_date", "check_out_date"],
+                name="booking_overlap_idx",
+            ),
+        ),
+    ]
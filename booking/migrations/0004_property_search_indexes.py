@@ -0,0 +1,41 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0003_booking_overlap_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(
+                fields=["city", "price_per_night"], name="property_city_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(fields=["country", "city"], name="property_country_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(
+                fields=["property_type", "price_per_night"], name="property_type_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(fields=["price_per_night"], name="property_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(
+                fields=["max_guests", "bedrooms"], name="property_capacity_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0004_property_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["created_at", "id"], name="booking_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(
+                fields=["created_at", "id"], name="property_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(fields=["created_at", "id"], name="review_created_idx"),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:51
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("season", "Сезон"),
+                            ("weekday", "День недели"),
+                            ("stay", "Длительность проживания"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("start_date", models.DateField(blank=True, null=True)),
+                ("end_date", models.DateField(blank=True, null=True)),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        null=True,
+                        validators=[django.core.validators.MaxValueValidator(6)],
+                    ),
+                ),
+                ("min_nights", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "percent",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=5,
+                        validators=[django.core.validators.MinValueValidator(-100)],
+                    ),
+                ),
+                (
+                    "property",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_rules",
+                        to="booking.property",
+                    ),
+                ),
+            ],
+        ),
+    ]
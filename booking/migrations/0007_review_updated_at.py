@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0006_price_rules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
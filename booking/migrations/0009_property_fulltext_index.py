@@ -0,0 +1,105 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# SQL записан здесь, а не берётся из booking.search: изменения модуля не
+# должны менять то, что делает уже применённая миграция
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE booking_property_fts USING fts5("
+    "name, description, address, city, "
+    "content='booking_property', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER booking_property_fts_ai AFTER INSERT ON booking_property "
+    "BEGIN "
+    "INSERT INTO booking_property_fts(rowid, name, description, address, city) "
+    "VALUES (new.id, new.name, new.description, new.address, new.city); "
+    "END",
+    "CREATE TRIGGER booking_property_fts_ad AFTER DELETE ON booking_property "
+    "BEGIN "
+    "INSERT INTO booking_property_fts("
+    "booking_property_fts, rowid, name, description, address, city) "
+    "VALUES ('delete', old.id, old.name, old.description, old.address, old.city); "
+    "END",
+    "CREATE TRIGGER booking_property_fts_au "
+    "AFTER UPDATE OF name, description, address, city ON booking_property "
+    "BEGIN "
+    "INSERT INTO booking_property_fts("
+    "booking_property_fts, rowid, name, description, address, city) "
+    "VALUES ('delete', old.id, old.name, old.description, old.address, old.city); "
+    "INSERT INTO booking_property_fts(rowid, name, description, address, city) "
+    "VALUES (new.id, new.name, new.description, new.address, new.city); "
+    "END",
+    "INSERT INTO booking_property_fts(booking_property_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS booking_property_fts_ai",
+    "DROP TRIGGER IF EXISTS booking_property_fts_ad",
+    "DROP TRIGGER IF EXISTS booking_property_fts_au",
+    "DROP TABLE IF EXISTS booking_property_fts",
+]
+
+POSTGRESQL_CREATE = [
+    "CREATE INDEX property_fulltext_idx ON booking_property USING GIN (("
+    "setweight(to_tsvector('simple', booking_property.name), 'A') || "
+    "setweight(to_tsvector('simple', booking_property.description), 'D') || "
+    "setweight(to_tsvector('simple', booking_property.address), 'C') || "
+    "setweight(to_tsvector('simple', booking_property.city), 'B')"
+    "))",
+]
+
+POSTGRESQL_DROP = ["DROP INDEX IF EXISTS property_fulltext_idx"]
+
+
+def _statements(connection, sqlite, postgresql):
+    if connection.vendor == "postgresql":
+        return postgresql
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if ("ENABLE_FTS5",) in cursor.fetchall():
+                return sqlite
+    # прочие СУБД и SQLite без FTS5 ищут через icontains
+    return []
+
+
+def create_index(apps, schema_editor):
+    for sql in _statements(schema_editor.connection, SQLITE_CREATE, POSTGRESQL_CREATE):
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    for sql in _statements(schema_editor.connection, SQLITE_DROP, POSTGRESQL_DROP):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0008_property_coordinates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PropertySearchEntry",
+            fields=[
+                (
+                    "property",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="booking.property",
+                    ),
+                ),
+                ("document", models.TextField(db_column="booking_property_fts")),
+            ],
+            options={
+                "db_table": "booking_property_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0009_property_fulltext_index"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="pricerule",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(
+                        ("end_date__isnull", False),
+                        ("kind", "season"),
+                        ("start_date__isnull", False),
+                        ("start_date__lt", models.F("end_date")),
+                    ),
+                    models.Q(
+                        ("kind", "weekday"),
+                        ("weekday__isnull", False),
+                        ("weekday__lte", 6),
+                    ),
+                    models.Q(("kind", "stay"), ("min_nights__isnull", False)),
+                    _connector="OR",
+                ),
+                name="price_rule_kind_fields",
+            ),
+        ),
+    ]
@@ -1,10 +1,70 @@
 from django.db import models
+from django.db.models import (
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, Now, NullIf
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 
+from . import geo
 
 User = get_user_model()
 
+
+class PropertyQuerySet(models.QuerySet):
+    def with_average_rating(self):
+        # средний рейтинг считается из денормализованных счётчиков, без JOIN с отзывами
+        return self.annotate(
+            avg_rating=ExpressionWrapper(
+                F("rating_sum") * 1.0 / NullIf(F("rating_count"), 0),
+                output_field=FloatField(),
+            )
+        )
+
+    def with_availability(self, start_date, end_date):
+        return self.annotate(
+            is_booked=Exists(
+                Booking.objects.filter(property=OuterRef("pk")).blocking(
+                    start_date, end_date
+                )
+            )
+        )
+
+    def available(self, start_date, end_date):
+        return self.exclude(
+            Exists(
+                Booking.objects.filter(property=OuterRef("pk")).blocking(
+                    start_date, end_date
+                )
+            )
+        )
+
+    def refresh_ratings(self):
+        # пересчёт rating_sum / rating_count одним UPDATE с подзапросами
+        reviews = (
+            Review.objects.filter(property=OuterRef("pk")).order_by().values("property")
+        )
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count("pk")).values("total")), 0
+            ),
+            # средний рейтинг входит в представление жилья
+            updated_at=Now(),
+        )
+
+
 class Property(models.Model):
     PROPERTY_TYPES = (
         ("hotel", "Отель"),
@@ -23,9 +83,92 @@ class Property(models.Model):
     max_guests = models.IntegerField()  # validators=[MaxValueValidator(1)]
     bedrooms = models.IntegerField()  # validators=[MinValueValidator(0)]
     bathrooms = models.IntegerField()  # validators=[MinValueValidator(0)]
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    # производное от координат, см. booking.geo
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PropertyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["city", "price_per_night"], name="property_city_idx"),
+            models.Index(fields=["country", "city"], name="property_country_idx"),
+            models.Index(
+                fields=["property_type", "price_per_night"], name="property_type_idx"
+            ),
+            models.Index(fields=["price_per_night"], name="property_price_idx"),
+            models.Index(
+                fields=["max_guests", "bedrooms"], name="property_capacity_idx"
+            ),
+            models.Index(fields=["created_at", "id"], name="property_created_idx"),
+            models.Index(fields=["geohash"], name="property_geohash_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+        if kwargs.get("update_fields") is not None and (
+            {"latitude", "longitude"} & set(kwargs["update_fields"])
+        ):
+            kwargs["update_fields"] = {*kwargs["update_fields"], "geohash"}
+        super().save(*args, **kwargs)
+
+    def update_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ""
+        else:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+
+    @property
+    def average_rating(self):
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
+        return 0
+
+
+class PropertySearchEntry(models.Model):
+    """Строка FTS5-индекса жилья (SQLite), таблица и триггеры — миграция 0009.
+
+    Колонка document — скрытая колонка FTS5 с именем таблицы: по ней
+    пишется MATCH и передаётся в bm25().
+    """
+
+    property = models.OneToOneField(
+        Property,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    document = models.TextField(db_column="booking_property_fts")
+
+    class Meta:
+        managed = False
+        db_table = "booking_property_fts"
+
+
+class BookingQuerySet(models.QuerySet):
+    def overlapping(self, start_date, end_date):
+        # полуинтервалы [check_in, check_out): выезд в день заезда не пересекается
+        return self.filter(check_in_date__lt=end_date, check_out_date__gt=start_date)
+
+    def blocking(self, start_date, end_date):
+        return self.filter(status__in=Booking.BLOCKING_STATUSES).overlapping(
+            start_date, end_date
+        )
+
 
 class Booking(models.Model):
     STATUS_CHOICES = (
@@ -34,6 +177,7 @@ class Booking(models.Model):
         ("cancelled", "Отменено"),
         ("completed", "Завершено"),
     )
+    BLOCKING_STATUSES = ("confirmed",)
     property = models.ForeignKey(
         Property, on_delete=models.CASCADE, related_name="bookings"
     )
@@ -46,6 +190,17 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["property", "status", "check_in_date", "check_out_date"],
+                name="booking_overlap_idx",
+            ),
+            models.Index(fields=["created_at", "id"], name="booking_created_idx"),
+        ]
+
 
 class Review(models.Model):
     property = models.ForeignKey(
@@ -57,3 +212,69 @@ class Review(models.Model):
     )
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="review_created_idx"),
+        ]
+
+
+class PriceRule(models.Model):
+    KINDS = (
+        ("season", "Сезон"),
+        ("weekday", "День недели"),
+        ("stay", "Длительность проживания"),
+    )
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="price_rules"
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    # season: ночи в [start_date, end_date)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    # weekday: 0 — понедельник
+    weekday = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MaxValueValidator(6)]
+    )
+    # stay: от min_nights ночей
+    min_nights = models.PositiveIntegerField(null=True, blank=True)
+    # наценка (+) или скидка (-) в процентах
+    percent = models.DecimalField(
+        max_digits=5, decimal_places=2, validators=[MinValueValidator(-100)]
+    )
+
+    # поля, без которых правило своего вида не применить
+    KIND_FIELDS = {
+        "season": ("start_date", "end_date"),
+        "weekday": ("weekday",),
+        "stay": ("min_nights",),
+    }
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(
+                    kind="season",
+                    start_date__isnull=False,
+                    end_date__isnull=False,
+                    start_date__lt=F("end_date"),
+                )
+                | Q(kind="weekday", weekday__isnull=False, weekday__lte=6)
+                | Q(kind="stay", min_nights__isnull=False),
+                name="price_rule_kind_fields",
+            ),
+        ]
+
+    def clean(self):
+        errors = {
+            name: "Обязательное поле для правила этого вида."
+            for name in self.KIND_FIELDS.get(self.kind, ())
+            if getattr(self, name) is None
+        }
+        if errors:
+            raise ValidationError(errors)
+        if self.kind == "season" and self.start_date >= self.end_date:
+            raise ValidationError(
+                {"end_date": "Конец сезона должен быть позже его начала."}
+            )
@@ -0,0 +1,207 @@
+"""Карты занятости жилья в кэше OCCUPANCY_CACHE_ALIAS.
+
+Рядом с картой в том же кэше лежит поколение жилья. Карта хранится с
+поколением, при котором её прочитали из БД, и на чтении принимается,
+только если оно совпадает с текущим. Запись брони после коммита
+увеличивает поколение и дописывает в карту изменённое окно, только если
+её никто не менял с прошлого поколения, иначе карта пересобирается
+при следующем чтении.
+
+С общим бэкендом (Redis, Memcached) карты согласованы между воркерами.
+LocMemCache по умолчанию у каждого процесса свой: чужие записи он видит
+не позже чем через TIMEOUT кэша.
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Booking
+
+CACHE_KEY = "booking:occupancy:{}"
+GENERATION_KEY = "booking:occupancy-generation:{}"
+
+
+def _cache():
+    return caches[settings.OCCUPANCY_CACHE_ALIAS]
+
+
+def _generation(property_id):
+    key = GENERATION_KEY.format(property_id)
+    generation = _cache().get(key)
+    if generation is None:
+        # первое значение задаёт add: параллельный воркер его не перезапишет
+        _cache().add(key, time.time_ns(), timeout=None)
+        generation = _cache().get(key)
+    return generation
+
+
+def _bump(property_id):
+    """Новое поколение жилья; incr атомарен в общих бэкендах."""
+    key = GENERATION_KEY.format(property_id)
+    try:
+        return _cache().incr(key)
+    except ValueError:
+        # ключ вытеснен: новое значение не совпадёт ни с одним прежним
+        generation = time.time_ns()
+        _cache().set(key, generation, timeout=None)
+        return generation
+
+
+def _store(property_id, generation, bitmap):
+    _cache().set(CACHE_KEY.format(property_id), (generation, *bitmap.dump()))
+
+
+class OccupancyBitmap:
+    """Занятость ночей жилья: один бит на ночь, начиная с даты origin.
+
+    Начало выровнено на 8 ночей, поэтому расширение влево добавляет
+    целые байты и не требует сдвига битов.
+    """
+
+    def __init__(self, origin=None, bits=b""):
+        self.origin = origin
+        self.bits = bytearray(bits)
+
+    def _grow(self, start, end):
+        first = start.toordinal() // 8 * 8
+        if self.origin is None:
+            self.origin = first
+        elif first < self.origin:
+            self.bits[0:0] = bytes((self.origin - first) // 8)
+            self.origin = first
+        size = (end.toordinal() - self.origin + 7) // 8
+        if size > len(self.bits):
+            self.bits.extend(bytes(size - len(self.bits)))
+
+    def set_range(self, start, end, occupied=True):
+        if start >= end:
+            return
+        if not occupied:
+            if self.origin is None:
+                return
+            # очищать нужно только покрытую часть
+            start = max(start, date.fromordinal(self.origin))
+            end = min(end, date.fromordinal(self.origin + len(self.bits) * 8))
+            if start >= end:
+                return
+        else:
+            self._grow(start, end)
+        for night in range(start.toordinal(), end.toordinal()):
+            index = night - self.origin
+            if occupied:
+                self.bits[index >> 3] |= 1 << (index & 7)
+            else:
+                self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def is_occupied(self, night):
+        if self.origin is None:
+            return False
+        index = night.toordinal() - self.origin
+        if index < 0 or index >= len(self.bits) * 8:
+            return False
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def window(self, start, end):
+        """Строка из '0'/'1' для ночей [start, end)."""
+        return "".join(
+            "1" if self.is_occupied(start + timedelta(days=offset)) else "0"
+            for offset in range((end - start).days)
+        )
+
+    def occupied_nights(self):
+        if self.origin is None:
+            return set()
+        return {
+            date.fromordinal(self.origin + index)
+            for index in range(len(self.bits) * 8)
+            if self.bits[index >> 3] & (1 << (index & 7))
+        }
+
+    def dump(self):
+        return (self.origin, bytes(self.bits))
+
+    @classmethod
+    def load(cls, value):
+        return cls(*value)
+
+
+def build(property_id):
+    """Полный пересчёт по подтверждённым бронированиям."""
+    # поколение читается до выборки: запись, закоммиченная во время
+    # пересчёта, сделает сохранённую карту устаревшей
+    generation = _generation(property_id)
+    bitmap = OccupancyBitmap()
+    bookings = Booking.objects.filter(
+        property_id=property_id, status__in=Booking.BLOCKING_STATUSES
+    ).values_list("check_in_date", "check_out_date")
+    for check_in_date, check_out_date in bookings.iterator():
+        bitmap.set_range(check_in_date, check_out_date)
+    _store(property_id, generation, bitmap)
+    return bitmap
+
+
+def _cached(property_id):
+    """(поколение карты, карта) или None."""
+    value = _cache().get(CACHE_KEY.format(property_id))
+    if value is None:
+        return None
+    return value[0], OccupancyBitmap.load(value[1:])
+
+
+def cached(property_id):
+    cache = _cache()
+    values = cache.get_many(
+        [CACHE_KEY.format(property_id), GENERATION_KEY.format(property_id)]
+    )
+    value = values.get(CACHE_KEY.format(property_id))
+    if value is None or value[0] != values.get(GENERATION_KEY.format(property_id)):
+        return None
+    return OccupancyBitmap.load(value[1:])
+
+
+def get(property_id):
+    bitmap = cached(property_id)
+    if bitmap is None:
+        bitmap = build(property_id)
+    return bitmap
+
+
+def _refresh(property_id, start_date, end_date):
+    generation = _bump(property_id)
+    entry = _cached(property_id)
+    if entry is None or entry[0] != generation - 1:
+        # карты нет или её успел изменить другой процесс: соберут при чтении
+        return
+    bitmap = entry[1]
+    bitmap.set_range(start_date, end_date, occupied=False)
+    bookings = (
+        Booking.objects.filter(property_id=property_id)
+        .blocking(start_date, end_date)
+        .values_list("check_in_date", "check_out_date")
+    )
+    for check_in_date, check_out_date in bookings:
+        bitmap.set_range(max(check_in_date, start_date), min(check_out_date, end_date))
+    _store(property_id, generation, bitmap)
+
+
+def refresh(property_id, start_date, end_date):
+    """Пересчитывает окно [start_date, end_date) после коммита транзакции."""
+    transaction.on_commit(lambda: _refresh(property_id, start_date, end_date))
+
+
+def forget(property_id):
+    forget_many([property_id])
+
+
+def forget_many(property_ids):
+    property_ids = list(property_ids)
+
+    def bump():
+        for property_id in property_ids:
+            _bump(property_id)
+
+    transaction.on_commit(bump)
@@ -2,4 +2,4 @@ from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.method in SAFE_METHODS or obj.owner == request.user
\ No newline at end of file
+        return request.method in SAFE_METHODS or obj.owner_id == request.user.id
\ No newline at end of file
@@ -0,0 +1,103 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import accumulate
+
+from .models import Booking, PriceRule, Property
+
+CENT = Decimal("0.01")
+HUNDRED = Decimal(100)
+
+_total_field = Booking._meta.get_field("total_price")
+# наибольшая сумма, которую примет Booking.total_price
+MAX_TOTAL = (
+    Decimal(10) ** (_total_field.max_digits - _total_field.decimal_places) - CENT
+)
+
+
+class PriceCalendar:
+    """Цены ночей одного объекта на окне дат.
+
+    Цена ночи считается один раз, итог брони — разность префиксных сумм,
+    поэтому любое число запросов на одном окне стоит O(ночей окна).
+    """
+
+    def __init__(self, price_per_night, rules, start_date, end_date):
+        self.start_date = start_date
+        seasons = [rule for rule in rules if rule.kind == "season"]
+        weekdays = defaultdict(list)
+        for rule in rules:
+            if rule.kind == "weekday":
+                weekdays[rule.weekday].append(rule)
+        self.stay_rules = sorted(
+            (rule for rule in rules if rule.kind == "stay"),
+            key=lambda rule: rule.min_nights,
+        )
+
+        nightly = []
+        for offset in range((end_date - start_date).days):
+            night = start_date + timedelta(days=offset)
+            price = price_per_night
+            for rule in seasons:
+                if rule.start_date <= night < rule.end_date:
+                    price *= 1 + rule.percent / HUNDRED
+            for rule in weekdays[night.weekday()]:
+                price *= 1 + rule.percent / HUNDRED
+            nightly.append(price)
+        self.prefix = [Decimal(0), *accumulate(nightly)]
+
+    def total(self, check_in_date, check_out_date):
+        start = (check_in_date - self.start_date).days
+        end = (check_out_date - self.start_date).days
+        total = self.prefix[end] - self.prefix[start]
+        nights = end - start
+        # действует скидка с наибольшим выполненным порогом
+        for rule in reversed(self.stay_rules):
+            if nights >= rule.min_nights:
+                total *= 1 + rule.percent / HUNDRED
+                break
+        total = total.quantize(CENT, rounding=ROUND_HALF_UP)
+        # наценки правил могут вывести сумму за пределы колонки
+        return total if total <= MAX_TOTAL else None
+
+
+def quote(stays, properties=None):
+    """Итоговые цены для списка (property_id, check_in_date, check_out_date).
+
+    Объекты и правила читаются двумя запросами на весь список; для
+    неизвестного объекта и суммы больше MAX_TOTAL возвращается None.
+    """
+    property_ids = {property_id for property_id, _, _ in stays}
+    if properties is None:
+        properties = Property.objects.only("price_per_night").in_bulk(property_ids)
+    rules = defaultdict(list)
+    for rule in PriceRule.objects.filter(property__in=property_ids):
+        rules[rule.property_id].append(rule)
+
+    windows = {}
+    for property_id, check_in_date, check_out_date in stays:
+        start, end = windows.get(property_id, (check_in_date, check_out_date))
+        windows[property_id] = (min(start, check_in_date), max(end, check_out_date))
+
+    calendars = {
+        property_id: PriceCalendar(
+            properties[property_id].price_per_night, rules[property_id], start, end
+        )
+        for property_id, (start, end) in windows.items()
+        if property_id in properties
+    }
+    return [
+        (
+            calendars[property_id].total(check_in_date, check_out_date)
+            if property_id in calendars
+            else None
+        )
+        for property_id, check_in_date, check_out_date in stays
+    ]
+
+
+def price_stay(property, check_in_date, check_out_date):
+    [total] = quote(
+        [(property.pk, check_in_date, check_out_date)], {property.pk: property}
+    )
+    return total
@@ -0,0 +1,135 @@
+"""Кэш сериализованных ответов списка и карточек жилья.
+
+Бэкенд задаётся настройкой PROPERTY_CACHE_ALIAS (по умолчанию LocMemCache
+с LRU-вытеснением и TTL). Записи не удаляются, а устаревают: карточка
+хранится вместе с версией объекта, ключ списка содержит поколение списков.
+Коммит изменения жилья, его отзывов или владельца меняет версию и поколение,
+поэтому ответ, прочитанный из БД до изменения, уже не будет отдан.
+Списки с фильтром по датам (check_in, check_out) зависят ещё и от броней:
+в их ключе есть поколение доступности, его меняет коммит брони,
+занимающей или освобождающей даты.
+У каждого формата ответа (JSON, MessagePack) свои записи: ETag в них разный.
+
+LocMemCache у каждого процесса свой: запись, сделанная в одном воркере,
+сбрасывает кэш только этого воркера, остальные отдают прежний ответ до
+истечения TIMEOUT. Чтобы изменения видели все воркеры, PROPERTY_CACHE_ALIAS
+должен указывать на общий бэкенд (Redis, Memcached).
+"""
+
+import threading
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+LIST_GENERATION_KEY = "properties:list-generation"
+AVAILABILITY_GENERATION_KEY = "properties:availability-generation"
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+stats = CacheStats()
+
+
+def _cache():
+    return caches[settings.PROPERTY_CACHE_ALIAS]
+
+
+def _detail_key(pk, representation):
+    return f"properties:detail:{pk}:{representation}"
+
+
+def _version_key(pk):
+    return f"properties:version:{pk}"
+
+
+def _bump(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ключ вытеснен: новое значение не совпадёт ни с одним прежним
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def in_process():
+    """Кэш в памяти процесса: его можно читать прямо из цикла событий."""
+    return isinstance(_cache(), LocMemCache)
+
+
+def lookup_detail(pk, representation="json"):
+    """Возвращает (данные или None, версия для последующего store_detail)."""
+    detail_key = _detail_key(pk, representation)
+    values = _cache().get_many([detail_key, _version_key(pk)])
+    version = values.get(_version_key(pk))
+    entry = values.get(detail_key)
+    data = entry[1] if entry is not None and entry[0] == version else None
+    stats.record(data is not None)
+    return data, version
+
+
+def store_detail(pk, version, data, representation="json"):
+    _cache().set(_detail_key(pk, representation), (version, data))
+
+
+def list_key(url, representation="json", dated=False):
+    """dated — список отфильтрован по свободным датам."""
+    if dated:
+        values = _cache().get_many([LIST_GENERATION_KEY, AVAILABILITY_GENERATION_KEY])
+        generation = (
+            f"{values.get(LIST_GENERATION_KEY)}."
+            f"{values.get(AVAILABILITY_GENERATION_KEY)}"
+        )
+    else:
+        generation = _cache().get(LIST_GENERATION_KEY)
+    digest = md5(url.encode()).hexdigest()
+    return f"properties:list:{generation}:{representation}:{digest}"
+
+
+def lookup_list(key):
+    data = _cache().get(key)
+    stats.record(data is not None)
+    return data
+
+
+def store_list(key, data):
+    _cache().set(key, data)
+
+
+def _bump_all(keys):
+    for key in keys:
+        _bump(key)
+
+
+def invalidate(property_ids):
+    """Меняет версии жилья и поколение списков после коммита транзакции.
+
+    До коммита параллельное чтение видит прежнюю строку: под новой версией
+    оно сохранило бы устаревший ответ.
+    """
+    keys = [_version_key(pk) for pk in property_ids] + [LIST_GENERATION_KEY]
+    transaction.on_commit(lambda: _bump_all(keys))
+
+
+def invalidate_availability():
+    """Сбрасывает списки с фильтром по датам после коммита транзакции."""
+    transaction.on_commit(lambda: _bump(AVAILABILITY_GENERATION_KEY))
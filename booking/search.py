@@ -0,0 +1,118 @@
+"""Полнотекстовый поиск по name, description, address и city жилья.
+
+SQLite — внешняя таблица FTS5 над booking_property, синхронизируется
+триггерами (в том числе для bulk_create и QuerySet.update) и читается
+через неуправляемую модель PropertySearchEntry. PostgreSQL — GIN-индекс
+по выражению tsvector (PG_VECTOR), который СУБД поддерживает сама.
+Таблицу, триггеры и индекс создаёт миграция 0009_property_fulltext_index,
+при их изменении нужна новая миграция. На прочих СУБД,
+а также на SQLite без FTS5, остаётся icontains.
+
+Запрос пользователя разбирается на слова, каждое ищется как префикс,
+все слова обязательны. search_rank — чем меньше, тем релевантнее.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Lookup, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Property, PropertySearchEntry
+
+FIELDS = ("name", "description", "address", "city")
+MAX_TERMS = 16
+
+TABLE = Property._meta.db_table
+FTS_TABLE = PropertySearchEntry._meta.db_table
+# веса bm25 в порядке FIELDS
+FTS_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+PG_INDEX = "property_fulltext_idx"
+PG_VECTOR = " || ".join(
+    f"setweight(to_tsvector('simple', {TABLE}.{field}), '{weight}')"
+    for field, weight in zip(FIELDS, "ADCB")
+)
+
+_fts5 = {}
+
+
+@PropertySearchEntry._meta.get_field("document").register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+
+def terms(query):
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def backend(connection):
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite":
+        if connection.alias not in _fts5:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA compile_options")
+                _fts5[connection.alias] = ("ENABLE_FTS5",) in cursor.fetchall()
+        if _fts5[connection.alias]:
+            return "sqlite"
+    return None
+
+
+def search(queryset, query):
+    """Фильтрует queryset по запросу и добавляет аннотацию search_rank."""
+    words = terms(query)
+    kind = backend(connections[queryset.db])
+    if kind == "sqlite":
+        # соединение с FTS5 по rowid: индекс ведёт выборку, bm25 считается
+        # за один проход по совпадениям
+        condition = Q(
+            search_entry__document__match=" ".join(f'"{word}"*' for word in words)
+        )
+        rank = Func(
+            F("search_entry__document"),
+            *(Value(weight) for weight in FTS_WEIGHTS),
+            function="bm25",
+            output_field=FloatField(),
+        )
+    elif kind == "postgresql":
+        tsquery = " & ".join(f"{word}:*" for word in words)
+        condition = RawSQL(
+            f"{PG_VECTOR} @@ to_tsquery('simple', %s)",
+            (tsquery,),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"-ts_rank({PG_VECTOR}, to_tsquery('simple', %s))",
+            (tsquery,),
+            output_field=FloatField(),
+        )
+    else:
+        condition = Q()
+        for word in words:
+            condition &= Q.create(
+                [(f"{field}__icontains", word) for field in FIELDS],
+                connector=Q.OR,
+            )
+        rank = Value(0.0)
+
+    if not words:
+        return queryset.annotate(search_rank=Value(0.0)).none()
+    return queryset.filter(condition).annotate(search_rank=rank)
+
+
+def rebuild(connection):
+    """Перестраивает индекс из текущего содержимого booking_property."""
+    kind = backend(connection)
+    with connection.cursor() as cursor:
+        if kind == "sqlite":
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        elif kind == "postgresql":
+            cursor.execute(f"REINDEX INDEX {PG_INDEX}")
+    return kind
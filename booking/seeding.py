@@ -0,0 +1,211 @@
+"""Синтетические данные для нагрузочных замеров (``manage.py seed_bench``).
+
+Распределения грубо повторяют реальные: у немногих хозяев много объектов
+(Парето), спрос на жильё неравномерный (логнормальный), цены зависят от
+типа и города, брони одного объекта идут подряд без пересечений, оценки
+смещены к 4–5.
+"""
+
+import random
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from . import response_cache
+from .models import Booking, Property, Review
+
+User = get_user_model()
+
+# город, страна, широта, долгота, доля объектов, множитель цены
+CITIES = (
+    ("Москва", "Россия", 55.7558, 37.6173, 30, 1.4),
+    ("Санкт-Петербург", "Россия", 59.9343, 30.3351, 20, 1.2),
+    ("Сочи", "Россия", 43.5855, 39.7231, 12, 1.3),
+    ("Казань", "Россия", 55.7963, 49.1088, 8, 0.9),
+    ("Екатеринбург", "Россия", 56.8389, 60.6057, 6, 0.8),
+    ("Калининград", "Россия", 54.7104, 20.4522, 5, 0.9),
+    ("Новосибирск", "Россия", 55.0084, 82.9357, 5, 0.7),
+    ("Минск", "Беларусь", 53.9006, 27.559, 6, 0.7),
+    ("Тбилиси", "Грузия", 41.7151, 44.8271, 4, 0.8),
+    ("Алматы", "Казахстан", 43.2389, 76.8897, 4, 0.7),
+)
+# тип, доля, медианная цена за ночь, спальни (от, до)
+PROPERTY_TYPES = (
+    ("apartment", 55, 3500, (1, 3)),
+    ("house", 20, 7000, (2, 5)),
+    ("hotel", 15, 5000, (1, 1)),
+    ("villa", 10, 15000, (3, 7)),
+)
+STATUSES = (("confirmed", 60), ("completed", 20), ("pending", 10), ("cancelled", 10))
+RATINGS = ((5, 50), (4, 30), (3, 12), (2, 5), (1, 3))
+
+ADJECTIVES = (
+    "уютная светлая просторная тихая современная панорамная солнечная "
+    "историческая стильная семейная"
+).split()
+NOUNS = "квартира студия лофт дом вилла мансарда комната коттедж апартаменты".split()
+FEATURES = (
+    "вид на море, рядом метро, парковка, балкон, камин, сауна, бассейн, "
+    "терраса, кухня, wifi, детская кроватка, трансфер из аэропорта, "
+    "рядом парк, центр города, тихий двор, рабочее место"
+).split(", ")
+COMMENTS = (
+    "Всё понравилось, вернёмся ещё.",
+    "Чисто и уютно, хозяин на связи.",
+    "Хорошее расположение, но шумно ночью.",
+    "Фото соответствуют действительности.",
+    "Не хватало посуды, в остальном отлично.",
+    "Заселение заняло много времени.",
+)
+
+START_DATE = date(2024, 1, 1)
+
+
+def _weighted(rng, items):
+    population = [item[0] for item in items]
+    return rng.choices(population, weights=[item[1] for item in items])
+
+
+def _insert(model, objects, batch_size):
+    created = []
+    objects = iter(objects)
+    while batch := list(islice(objects, batch_size)):
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+def _make_property(rng, index, owner):
+    city, country, latitude, longitude, _, city_factor = rng.choices(
+        CITIES, weights=[city[4] for city in CITIES]
+    )[0]
+    kind, _, median_price, (min_bedrooms, max_bedrooms) = rng.choices(
+        PROPERTY_TYPES, weights=[kind[1] for kind in PROPERTY_TYPES]
+    )[0]
+    bedrooms = rng.randint(min_bedrooms, max_bedrooms)
+    price = median_price * city_factor * rng.lognormvariate(0, 0.4)
+    property = Property(
+        name=f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(NOUNS)} #{index}",
+        description=", ".join(rng.sample(FEATURES, rng.randint(2, 6))).capitalize(),
+        property_type=kind,
+        address=f"ул. {rng.choice(NOUNS).capitalize()}ная, {rng.randint(1, 200)}",
+        city=city,
+        country=country,
+        owner_id=owner,
+        price_per_night=Decimal(round(price, -1)).quantize(Decimal("0.01")),
+        max_guests=bedrooms * 2 + rng.randint(0, 1),
+        bedrooms=bedrooms,
+        bathrooms=max(1, bedrooms // 2),
+        latitude=latitude + rng.gauss(0, 0.05),
+        longitude=longitude + rng.gauss(0, 0.05),
+    )
+    property.update_geohash()
+    return property
+
+
+def _make_bookings(rng, property, guests, count):
+    # брони одного объекта идут подряд, поэтому подтверждённые не пересекаются
+    check_in_date = START_DATE + timedelta(days=rng.randint(0, 60))
+    for _ in range(count):
+        check_in_date += timedelta(days=min(int(rng.expovariate(1 / 5)), 60))
+        nights = 1 + min(int(rng.expovariate(1 / 3)), 20)
+        check_out_date = check_in_date + timedelta(days=nights)
+        yield Booking(
+            property_id=property.pk,
+            user_id=rng.choice(guests),
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            guests_count=rng.randint(1, property.max_guests),
+            total_price=property.price_per_night * nights,
+            status=_weighted(rng, STATUSES)[0],
+        )
+        check_in_date = check_out_date
+
+
+def seed(
+    users=1000, properties=2000, bookings=10000, reviews=3000, seed=0, batch_size=1000
+):
+    """Создаёт данные и возвращает число созданных строк по моделям."""
+    rng = random.Random(seed)
+    password = make_password("bench")
+    owners_count = max(1, users // 10)
+
+    with transaction.atomic():
+        suffix = User.objects.count()
+        created_users = _insert(
+            User,
+            (
+                User(
+                    username=f"bench-{suffix + i}",
+                    email=f"bench-{suffix + i}@example.com",
+                    password=password,
+                    is_owner=i < owners_count,
+                )
+                for i in range(users)
+            ),
+            batch_size,
+        )
+        user_ids = [user.pk for user in created_users]
+        owner_ids = user_ids[:owners_count]
+        # немногие хозяева владеют большей частью объектов
+        owner_weights = [rng.paretovariate(1.2) for _ in owner_ids]
+        created_properties = _insert(
+            Property,
+            (
+                _make_property(rng, i, rng.choices(owner_ids, owner_weights)[0])
+                for i in range(properties)
+            ),
+            batch_size,
+        )
+
+        popularity = [rng.lognormvariate(0, 1) for _ in created_properties]
+        per_property = Counter(
+            rng.choices(range(len(created_properties)), popularity, k=bookings)
+        )
+        created_bookings = _insert(
+            Booking,
+            (
+                booking
+                for index, count in sorted(per_property.items())
+                for booking in _make_bookings(
+                    rng, created_properties[index], user_ids, count
+                )
+            ),
+            batch_size,
+        )
+
+        reviewed = [
+            booking
+            for booking in created_bookings
+            if booking.status in ("confirmed", "completed")
+        ]
+        reviewed = rng.sample(reviewed, min(reviews, len(reviewed)))
+        created_reviews = _insert(
+            Review,
+            (
+                Review(
+                    property_id=booking.property_id,
+                    user_id=booking.user_id,
+                    rating=_weighted(rng, RATINGS)[0],
+                    comment=rng.choice(COMMENTS),
+                )
+                for booking in reviewed
+            ),
+            batch_size,
+        )
+        # bulk_create не вызывает сигналы: агрегаты и кэш обновляем сами
+        Property.objects.filter(
+            pk__in=Review.objects.values("property")
+        ).refresh_ratings()
+    response_cache.invalidate([])
+
+    return {
+        "users": len(created_users),
+        "properties": len(created_properties),
+        "bookings": len(created_bookings),
+        "reviews": len(created_reviews),
+    }
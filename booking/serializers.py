@@ -1,42 +1,342 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 
+from core.metrics import TimedListSerializer, TimedSerializerMixin
+from core.sparse import SparseSerializerMixin
+
+from . import occupancy, pricing, reservations, response_cache
 from .models import Property, Booking, Review
 
+OVERLAP_ERROR = "Жильё уже забронировано на выбранные даты."
+PRICE_ERROR = "Стоимость проживания превышает допустимую сумму брони."
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Берёт объекты из context["prefetched"], если их загрузили заранее.
+
+    Без предзагрузки ведёт себя как обычный PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in prefetched:
+            self.fail("does_not_exist", pk_value=data)
+        return prefetched[pk]
+
+
+class BulkListSerializer(TimedListSerializer):
+    """Пакетная загрузка: связанные объекты читаются одним запросом на поле,
+    вставка выполняется через bulk_create."""
+
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context["prefetched"] = self._prefetch(data)
+        return super().to_internal_value(data)
+
+    def _prefetch(self, data):
+        prefetched = {}
+        for name, field in self.child.fields.items():
+            if field.read_only or not isinstance(
+                field, PrefetchedPrimaryKeyRelatedField
+            ):
+                continue
+            pks = set()
+            for item in data:
+                try:
+                    pks.add(int(item[name]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            prefetched[name] = field.get_queryset().in_bulk(pks)
+        return prefetched
+
+    def build_instance(self, attrs):
+        return self.child.Meta.model(**attrs)
+
+    def create(self, validated_data):
+        # bulk_create сам выполняется в одной транзакции
+        return self.child.Meta.model.objects.bulk_create(
+            [self.build_instance(attrs) for attrs in validated_data],
+            batch_size=self.batch_size,
+        )
+
+
+class PropertyListSerializer(BulkListSerializer):
+    def build_instance(self, attrs):
+        # bulk_create не вызывает save(), геохеш считаем здесь
+        instance = super().build_instance(attrs)
+        instance.update_geohash()
+        return instance
+
+    def create(self, validated_data):
+        properties = super().create(validated_data)
+        # bulk_create не шлёт сигналы: новые объекты должны попасть в списки
+        response_cache.invalidate([])
+        return properties
+
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(
+    SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     average_rating = serializers.SerializerMethodField()
+    # для core.readers: то же, что get_average_rating по аннотации avg_rating
+    values_fields = {
+        "average_rating": ("avg_rating", lambda rating: 0 if rating is None else rating)
+    }
 
     class Meta:
         model = Property
-        fields = "__all__"
+        exclude = ("rating_sum", "rating_count", "geohash")
+        list_serializer_class = PropertyListSerializer
 
     def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
-        return 0
+        if hasattr(obj, "avg_rating"):
+            # аннотация NULL ровно тогда, когда отзывов нет; счётчики
+            # не читаем — при ?fields= они могут быть отложены
+            return 0 if obj.avg_rating is None else obj.avg_rating
+        return obj.average_rating
+
+
+class BookingListSerializer(BulkListSerializer):
+    def create(self, validated_data):
+        # проверка пересечений и вставка — под теми же замками, что и
+        # одиночная бронь (reservations.save_booking)
+        with reservations.locked_properties(
+            attrs["property"].pk for attrs in validated_data
+        ):
+            errors = self._find_conflicts(validated_data)
+            if any(errors):
+                raise serializers.ValidationError(errors)
+            totals = pricing.quote(
+                [
+                    (
+                        attrs["property"].pk,
+                        attrs["check_in_date"],
+                        attrs["check_out_date"],
+                    )
+                    for attrs in validated_data
+                ],
+                {attrs["property"].pk: attrs["property"] for attrs in validated_data},
+            )
+            if None in totals:
+                raise serializers.ValidationError(
+                    [
+                        (
+                            {}
+                            if total_price is not None
+                            else {"non_field_errors": [PRICE_ERROR]}
+                        )
+                        for total_price in totals
+                    ]
+                )
+            for attrs, total_price in zip(validated_data, totals):
+                attrs["total_price"] = total_price
+            bookings = super().create(validated_data)
+        # bulk_create не шлёт сигналы: сбрасываем карты занятости и
+        # списки по датам вручную
+        blocked = {
+            booking.property_id
+            for booking in bookings
+            if booking.status in Booking.BLOCKING_STATUSES
+        }
+        occupancy.forget_many(blocked)
+        if blocked:
+            response_cache.invalidate_availability()
+        return bookings
 
+    def _find_conflicts(self, validated):
+        # одна выборка подтверждённых броней на весь диапазон дат пакета
+        items = [attrs for attrs in validated if attrs.get("status") != "cancelled"]
+        if not items:
+            return []
+        taken = defaultdict(list)
+        existing = (
+            Booking.objects.filter(property__in={attrs["property"] for attrs in items})
+            .blocking(
+                min(attrs["check_in_date"] for attrs in items),
+                max(attrs["check_out_date"] for attrs in items),
+            )
+            .values_list("property_id", "check_in_date", "check_out_date")
+        )
+        for property_id, check_in_date, check_out_date in existing:
+            taken[property_id].append((check_in_date, check_out_date))
+
+        errors = []
+        for attrs in validated:
+            intervals = taken[attrs["property"].pk]
+            if attrs.get("status") != "cancelled" and any(
+                check_in_date < attrs["check_out_date"]
+                and check_out_date > attrs["check_in_date"]
+                for check_in_date, check_out_date in intervals
+            ):
+                errors.append({"non_field_errors": [OVERLAP_ERROR]})
+                continue
+            if attrs.get("status") in Booking.BLOCKING_STATUSES:
+                intervals.append((attrs["check_in_date"], attrs["check_out_date"]))
+            errors.append({})
+        return errors
 
-class BookingSerializer(serializers.ModelSerializer):
+
+class BookingSerializer(
+    SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
 
     class Meta:
         model = Booking
         fields = "__all__"
+        read_only_fields = ("total_price",)
+        list_serializer_class = BookingListSerializer
 
     def validate(self, data):
-        if "check_in_date" not in data or "check_out_date" not in data:
+        if self.instance is not None and not (
+            {"check_in_date", "check_out_date"} & data.keys()
+        ):
+            # частичное обновление без дат: правила дат не затрагиваются
+            return data
+        check_in_date = data.get(
+            "check_in_date", getattr(self.instance, "check_in_date", None)
+        )
+        check_out_date = data.get(
+            "check_out_date", getattr(self.instance, "check_out_date", None)
+        )
+        if check_in_date is None or check_out_date is None:
             raise serializers.ValidationError(
                 "Обязательными являются даты как заезда, так и отъезда."
             )
-        if data["check_in_date"] >= data["check_out_date"]:
+        if check_in_date >= check_out_date:
             raise serializers.ValidationError(
                 "Дата заезда должна предшествовать дате выезда."
             )
         return data
 
+    def create(self, validated_data):
+        booking = Booking(**validated_data)
+        booking.total_price = pricing.price_stay(
+            booking.property, booking.check_in_date, booking.check_out_date
+        )
+        return self._reserve(booking)
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        if {"property", "check_in_date", "check_out_date"} & validated_data.keys():
+            instance.total_price = pricing.price_stay(
+                instance.property, instance.check_in_date, instance.check_out_date
+            )
+        return self._reserve(instance)
+
+    def _reserve(self, booking):
+        if booking.total_price is None:
+            raise serializers.ValidationError({"non_field_errors": [PRICE_ERROR]})
+        try:
+            return reservations.save_booking(booking)
+        except reservations.BookingConflict:
+            raise serializers.ValidationError({"non_field_errors": [OVERLAP_ERROR]})
 
-class ReviewSerializer(serializers.ModelSerializer):
+
+class ReviewSerializer(
+    SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
 
     class Meta:
         model = Review
         fields = "__all__"
+        list_serializer_class = TimedListSerializer
+
+
+class DateRangeSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, data):
+        if data["start_date"] >= data["end_date"]:
+            raise serializers.ValidationError(
+                "Дата начала должна предшествовать дате окончания."
+            )
+        return data
+
+
+class BulkAvailabilitySerializer(DateRangeSerializer):
+    ids = serializers.CharField(required=False)
+
+    def validate_ids(self, value):
+        try:
+            return [int(pk) for pk in value.split(",") if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                "Ожидается список идентификаторов через запятую."
+            )
+
+
+class QuoteSerializer(serializers.Serializer):
+    MAX_NIGHTS = 366
+
+    property = serializers.IntegerField()
+    check_in_date = serializers.DateField()
+    check_out_date = serializers.DateField()
+    nights = serializers.IntegerField(read_only=True)
+    total_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True, allow_null=True
+    )
+
+    def validate(self, data):
+        nights = (data["check_out_date"] - data["check_in_date"]).days
+        if nights <= 0:
+            raise serializers.ValidationError(
+                "Дата заезда должна предшествовать дате выезда."
+            )
+        if nights > self.MAX_NIGHTS:
+            raise serializers.ValidationError(
+                f"Цена считается не более чем на {self.MAX_NIGHTS} ночей."
+            )
+        return data
+
+
+class NearbySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(
+        min_value=0.1, max_value=500, default=10, required=False
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=100, default=20, required=False
+    )
+
+
+class ExportSerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(
+        choices=("ndjson", "csv"), default="ndjson", required=False
+    )
+
+
+class CalendarSerializer(serializers.Serializer):
+    MAX_NIGHTS = 731
+
+    def get_fields(self):
+        # "from" — зарезервированное слово, поэтому поля объявлены здесь
+        return {"from": serializers.DateField(), "to": serializers.DateField()}
+
+    def validate(self, data):
+        nights = (data["to"] - data["from"]).days
+        if nights <= 0:
+            raise serializers.ValidationError(
+                "Дата начала должна предшествовать дате окончания."
+            )
+        if nights > self.MAX_NIGHTS:
+            raise serializers.ValidationError(
+                f"Календарь запрашивается не более чем на {self.MAX_NIGHTS} ночей."
+            )
+        return data
@@ -0,0 +1,126 @@
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import occupancy, response_cache
+from .models import Booking, Property, Review, User
+
+# исходное значение не прочитано: поле отложено (.only(), ?fields=).
+# В post_init его читать нельзя — чтение создаёт экземпляр для
+# refresh_from_db, и его post_init снова читает отложенные поля. Такие
+# экземпляры дочитывают исходные значения из БД перед записью.
+UNKNOWN = object()
+
+
+def _deferred(instance, *attnames):
+    return not instance.get_deferred_fields().isdisjoint(attnames)
+
+
+@receiver(post_init, sender=Review)
+def remember_review_property(sender, instance, **kwargs):
+    # запоминаем исходное жильё, чтобы при переносе отзыва пересчитать оба
+    if _deferred(instance, "property_id"):
+        instance._original_property_id = UNKNOWN
+    else:
+        instance._original_property_id = instance.property_id
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_delete, sender=Review)
+def load_review_property(sender, instance, **kwargs):
+    if instance._original_property_id is UNKNOWN:
+        instance._original_property_id = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list("property_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_property_rating(sender, instance, **kwargs):
+    property_ids = {instance._original_property_id} - {None}
+    # отложенное поле не менялось и равно исходному
+    if not _deferred(instance, "property_id"):
+        property_ids.add(instance.property_id)
+        instance._original_property_id = instance.property_id
+    Property.objects.filter(pk__in=property_ids).refresh_ratings()
+    response_cache.invalidate(property_ids)
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_property_responses(sender, instance, **kwargs):
+    response_cache.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_owner_responses(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    property_ids = list(instance.properties.values_list("pk", flat=True))
+    if property_ids:
+        response_cache.invalidate(property_ids)
+
+
+OCCUPANCY_FIELDS = ("status", "property_id", "check_in_date", "check_out_date")
+
+
+def _occupancy_state(status, property_id, check_in_date, check_out_date):
+    if status not in Booking.BLOCKING_STATUSES:
+        return None
+    return (property_id, check_in_date, check_out_date)
+
+
+def _booking_state(booking):
+    return _occupancy_state(*(getattr(booking, name) for name in OCCUPANCY_FIELDS))
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_state(sender, instance, **kwargs):
+    if _deferred(instance, *OCCUPANCY_FIELDS):
+        instance._original_occupancy = UNKNOWN
+    else:
+        instance._original_occupancy = _booking_state(instance)
+
+
+@receiver(pre_save, sender=Booking)
+@receiver(pre_delete, sender=Booking)
+def load_booking_state(sender, instance, **kwargs):
+    if instance._original_occupancy is UNKNOWN:
+        row = (
+            Booking.objects.filter(pk=instance.pk)
+            .values_list(*OCCUPANCY_FIELDS)
+            .first()
+        )
+        instance._original_occupancy = None if row is None else _occupancy_state(*row)
+
+
+def _refresh_occupancy(before, after):
+    if before == after:
+        return
+    for state in {before, after} - {None}:
+        occupancy.refresh(*state)
+    response_cache.invalidate_availability()
+
+
+@receiver(post_save, sender=Booking)
+def update_occupancy_on_save(sender, instance, created, **kwargs):
+    after = _booking_state(instance)
+    _refresh_occupancy(None if created else instance._original_occupancy, after)
+    instance._original_occupancy = after
+
+
+@receiver(post_delete, sender=Booking)
+def update_occupancy_on_delete(sender, instance, **kwargs):
+    _refresh_occupancy(instance._original_occupancy, None)
+
+
+@receiver(post_delete, sender=Property)
+def forget_property_occupancy(sender, instance, **kwargs):
+    occupancy.forget(instance.pk)
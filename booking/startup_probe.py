@@ -0,0 +1,97 @@
+"""Холодный старт одного процесса для ``manage.py bench startup``.
+
+python -m booking.startup_probe wsgi|asgi <путь>: импортирует точку входа,
+отдаёт первый запрос прямо вызываемому приложению, без сервера, и печатает
+JSON с временами от начала работы модуля.
+"""
+
+import asyncio
+import io
+import json
+import sys
+import time
+
+started = time.perf_counter()
+
+
+def wsgi_request(application, path):
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+    }
+    body = b"".join(application(environ, start_response))
+    return statuses[0], len(body)
+
+
+def asgi_request(application, path):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+    }
+    messages = []
+
+    async def receive():
+        if not messages:
+            messages.append(None)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # соединение не закрывается, пока обработчик не ответит
+        await asyncio.Future()
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return sent[0]["status"], len(body)
+
+
+def main(entry, path):
+    if entry == "wsgi":
+        from core.wsgi import application
+
+        request = wsgi_request
+    else:
+        from core.asgi import application
+
+        request = asgi_request
+    imported = time.perf_counter()
+    status, size = request(application, path)
+    responded = time.perf_counter()
+    print(
+        json.dumps(
+            {
+                "import_ms": round((imported - started) * 1000, 1),
+                "first_response_ms": round((responded - started) * 1000, 1),
+                "status": status,
+                "bytes": size,
+                "modules": len(sys.modules),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
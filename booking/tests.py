@@ -1,15 +1,73 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.conf import settings
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from rest_framework.test import APIClient
 from rest_framework import status
-from booking.models import Property, Booking, Review
-from datetime import date
+from rest_framework.exceptions import ValidationError
+from rest_framework.throttling import UserRateThrottle
+from rest_framework.versioning import QueryParameterVersioning
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+from django.core.cache import caches
+from django.core.management import call_command
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connection, router, transaction
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from core import profiling, renderers, schema
+from drf_spectacular.views import SpectacularAPIView
+from core.db_router import PIN_COOKIE, ReplicaMiddleware
+from core.readers import reader_for
+from users.authentication import make_token
+from booking import (
+    geo,
+    occupancy,
+    pricing,
+    reservations,
+    response_cache,
+    seeding,
+    signals,
+)
+from booking.models import Property, Booking, Review, PriceRule
+from booking.serializers import (
+    BookingSerializer,
+    PropertySerializer,
+    ReviewSerializer,
+)
+from booking.benchmarks import make_owner
+from booking.management.commands import bench
+from booking.views import PropertyViewSet, ReviewViewSet
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from django.utils.translation import gettext_lazy
+from pathlib import Path
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from unittest import mock, skipUnless
 
 User = get_user_model()
 
 
 class BookingAPITestCase(TestCase):
     def setUp(self):
+        for backend in caches.all():
+            backend.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(username="testuser", password="testpass")
         self.client.force_authenticate(user=self.user)
@@ -87,6 +145,516 @@ class BookingAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("is_availability", response.data)
 
+    def test_availability_detects_overlap(self):
+        Booking.objects.create(
+            property=self.property,
+            user=self.user,
+            check_in_date=date(2025, 2, 5),
+            check_out_date=date(2025, 2, 8),
+            guests_count=2,
+            total_price=300.0,
+            status="confirmed",
+        )
+        url = f"/api/v1/properties/{self.property.id}/availability/"
+        cases = [
+            ("2025-02-01", "2025-02-10", False),
+            ("2025-02-07", "2025-02-12", False),
+            ("2025-02-01", "2025-02-05", True),
+            ("2025-02-08", "2025-02-10", True),
+        ]
+        for start_date, end_date, expected in cases:
+            response = self.client.get(
+                url, {"start_date": start_date, "end_date": end_date}
+            )
+            self.assertEqual(response.data["is_availability"], expected)
+
+    def test_check_availability_invalid_range(self):
+        response = self.client.get(
+            f"/api/v1/properties/{self.property.id}/availability/",
+            {"start_date": "2025-02-10", "end_date": "2025-02-01"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_availability(self):
+        properties = [self.property]
+        for i in range(5):
+            properties.append(
+                Property.objects.create(
+                    name=f"Property {i}",
+                    description="Bulk",
+                    property_type="house",
+                    address="1 Street",
+                    city="Test City",
+                    country="Test Country",
+                    owner=self.user,
+                    price_per_night=50.0,
+                    max_guests=2,
+                    bedrooms=1,
+                    bathrooms=1,
+                )
+            )
+        for prop in properties[::2]:
+            Booking.objects.create(
+                property=prop,
+                user=self.user,
+                check_in_date=date(2025, 2, 3),
+                check_out_date=date(2025, 2, 6),
+                guests_count=1,
+                total_price=100.0,
+                status="confirmed",
+            )
+
+        ids = ",".join(str(prop.id) for prop in properties)
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/v1/properties/availability/",
+                {"start_date": "2025-02-01", "end_date": "2025-02-04", "ids": ids},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {
+                row["property"]: row["is_availability"]
+                for row in response.data["results"]
+            },
+            {prop.id: i % 2 == 1 for i, prop in enumerate(properties)},
+        )
+
+    def test_calendar(self):
+        Booking.objects.create(
+            property=self.property,
+            user=self.user,
+            check_in_date=date(2025, 2, 3),
+            check_out_date=date(2025, 2, 5),
+            guests_count=2,
+            total_price=200.0,
+            status="confirmed",
+        )
+        url = f"/api/v1/properties/{self.property.id}/calendar/"
+        params = {"from": "2025-02-01", "to": "2025-02-08"}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["occupied"], "0011000")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, params)
+        self.assertEqual(response.data["occupied"], "0011000")
+
+    def test_calendar_invalid_range(self):
+        response = self.client.get(
+            f"/api/v1/properties/{self.property.id}/calendar/",
+            {"from": "2025-02-01", "to": "2030-02-01"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_occupancy_matches_recomputation(self):
+        rng = random.Random(42)
+        base = date(2025, 1, 1)
+        occupancy.get(self.property.id)
+        bookings = []
+        for _ in range(200):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.random_booking_write(rng, base, bookings)
+
+            incremental = occupancy.cached(self.property.id)
+            self.assertIsNotNone(incremental)
+            caches["occupancy"].clear()
+            self.assertEqual(
+                incremental.occupied_nights(),
+                occupancy.build(self.property.id).occupied_nights(),
+            )
+
+    def random_booking_write(self, rng, base, bookings):
+        operation = rng.choice(["create", "status", "move", "delete"])
+        if operation == "create" or not bookings:
+            check_in_date = base + timedelta(days=rng.randrange(120))
+            bookings.append(
+                Booking.objects.create(
+                    property=self.property,
+                    user=self.user,
+                    check_in_date=check_in_date,
+                    check_out_date=check_in_date + timedelta(days=rng.randrange(1, 15)),
+                    guests_count=1,
+                    total_price=100.0,
+                    status=rng.choice(["pending", "confirmed"]),
+                )
+            )
+            return
+        booking = rng.choice(bookings)
+        if operation == "status":
+            booking.status = rng.choice(["pending", "confirmed", "cancelled"])
+            booking.save()
+        elif operation == "move":
+            shift = timedelta(days=rng.randrange(-10, 10))
+            booking.check_in_date += shift
+            booking.check_out_date += shift
+            booking.save()
+        else:
+            bookings.remove(booking)
+            booking.delete()
+
+    def test_occupancy_refreshes_after_commit(self):
+        occupancy.get(self.property.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Booking.objects.create(
+                property=self.property,
+                user=self.user,
+                check_in_date=date(2025, 2, 3),
+                check_out_date=date(2025, 2, 5),
+                guests_count=2,
+                total_price=200.0,
+                status="confirmed",
+            )
+            # до коммита карта прежняя
+            bitmap = occupancy.cached(self.property.id)
+            self.assertEqual(bitmap.occupied_nights(), set())
+        for callback in callbacks:
+            callback()
+        bitmap = occupancy.cached(self.property.id)
+        self.assertEqual(bitmap.occupied_nights(), {date(2025, 2, 3), date(2025, 2, 4)})
+
+    def test_occupancy_generation_bumped_elsewhere(self):
+        occupancy.get(self.property.id)
+        # другой воркер записал бронь и увеличил поколение в общем кэше
+        caches["occupancy"].incr(occupancy.GENERATION_KEY.format(self.property.id))
+        self.assertIsNone(occupancy.cached(self.property.id))
+
+    def test_filter_properties(self):
+        for i, (city, price, guests) in enumerate(
+            [("Paris", 80, 2), ("Paris", 200, 6), ("Rome", 120, 4)]
+        ):
+            Property.objects.create(
+                name=f"Filtered {i}",
+                description="Filter me",
+                property_type="villa",
+                address="1 Street",
+                city=city,
+                country="Europe",
+                owner=self.user,
+                price_per_night=price,
+                max_guests=guests,
+                bedrooms=guests // 2,
+                bathrooms=1,
+            )
+        cases = [
+            ({"city": "Paris"}, {"Filtered 0", "Filtered 1"}),
+            ({"city": "Paris", "max_price": "100"}, {"Filtered 0"}),
+            ({"min_price": "110", "guests": 4}, {"Filtered 1", "Filtered 2"}),
+            ({"property_type": "villa", "bedrooms": 3}, {"Filtered 1"}),
+            ({"country": "Europe", "city": "Rome"}, {"Filtered 2"}),
+        ]
+        for params, expected in cases:
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/v1/properties/", params)
+            self.assertEqual(
+                {row["name"] for row in response.data["results"]}, expected
+            )
+
+    def test_filter_properties_by_dates(self):
+        Booking.objects.create(
+            property=self.property,
+            user=self.user,
+            check_in_date=date(2025, 2, 3),
+            check_out_date=date(2025, 2, 6),
+            guests_count=2,
+            total_price=300.0,
+            status="confirmed",
+        )
+        params = {"city": "Test City", "check_in": "2025-02-05"}
+        response = self.client.get("/api/v1/properties/", params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        params["check_out"] = "2025-02-08"
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/properties/", params)
+        self.assertEqual(response.data["results"], [])
+
+        params.update(check_in="2025-02-06", check_out="2025-02-08")
+        response = self.client.get("/api/v1/properties/", params)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def _create_located(self, name, latitude, longitude):
+        return Property.objects.create(
+            name=name,
+            description="Located",
+            property_type="apartment",
+            address="1 Street",
+            city="Geo City",
+            country="Test Country",
+            owner=self.user,
+            price_per_night=100.0,
+            max_guests=2,
+            bedrooms=1,
+            bathrooms=1,
+            latitude=latitude,
+            longitude=longitude,
+        )
+
+    def test_geohash_follows_coordinates(self):
+        place = self._create_located("Moscow", 55.7558, 37.6173)
+        self.assertEqual(place.geohash, geo.encode(55.7558, 37.6173))
+        self.assertTrue(place.geohash.startswith("ucfv0"))
+
+        place.latitude, place.longitude = 59.9343, 30.3351
+        place.save(update_fields=["latitude", "longitude"])
+        place.refresh_from_db()
+        self.assertTrue(place.geohash.startswith("udtsf"))
+
+        place.latitude = None
+        place.save()
+        place.refresh_from_db()
+        self.assertEqual(place.geohash, "")
+
+    def test_nearby_properties(self):
+        self._create_located("Center", 55.7558, 37.6173)
+        self._create_located("Two km", 55.7738, 37.6173)
+        self._create_located("Eight km", 55.8278, 37.6173)
+        self._create_located("Far", 59.9343, 30.3351)
+
+        params = {"lat": 55.7558, "lon": 37.6173, "radius_km": 5}
+        # координаты кандидатов и затем только ближайшие объекты целиком
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/v1/properties/nearby/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["name"] for row in response.data], ["Center", "Two km"])
+        self.assertAlmostEqual(response.data[1]["distance_km"], 2.0, delta=0.05)
+
+        params.update(radius_km=10, limit=2)
+        response = self.client.get("/api/v1/properties/nearby/", params)
+        self.assertEqual([row["name"] for row in response.data], ["Center", "Two km"])
+
+        params.update(limit=10, city="Other City")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/properties/nearby/", params)
+        self.assertEqual(response.data, [])
+
+        response = self.client.get("/api/v1/properties/nearby/", {"lat": 91, "lon": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nearby_across_antimeridian_and_pole(self):
+        self._create_located("East", -16.5, 179.99)
+        self._create_located("West", -16.5, -179.99)
+        self._create_located("Pole", 89.99, 10.0)
+        self._create_located("Across pole", 89.99, -170.0)
+        for lon, expected in (
+            (179.995, ["East", "West"]),
+            (-179.995, ["West", "East"]),
+        ):
+            response = self.client.get(
+                "/api/v1/properties/nearby/", {"lat": -16.5, "lon": lon, "radius_km": 5}
+            )
+            self.assertEqual([row["name"] for row in response.data], expected)
+
+        response = self.client.get(
+            "/api/v1/properties/nearby/", {"lat": 89.99, "lon": 10.0, "radius_km": 5}
+        )
+        self.assertEqual(
+            [row["name"] for row in response.data], ["Pole", "Across pole"]
+        )
+
+    def test_filter_properties_by_bbox(self):
+        self._create_located("Inside", 55.75, 37.61)
+        self._create_located("Outside", 55.95, 37.61)
+        bbox = {"min_lat": 55.7, "max_lat": 55.8, "min_lon": 37.5, "max_lon": 37.7}
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/properties/", bbox)
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Inside"])
+
+        del bbox["max_lon"]
+        response = self.client.get("/api/v1/properties/", bbox)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_created_properties_get_geohash(self):
+        item = {
+            "name": "Imported",
+            "description": "Imported",
+            "property_type": "hotel",
+            "address": "3 Street",
+            "city": "Import City",
+            "country": "Test Country",
+            "owner": self.user.id,
+            "price_per_night": "90.00",
+            "max_guests": 2,
+            "bedrooms": 1,
+            "bathrooms": 1,
+            "latitude": 55.7558,
+            "longitude": 37.6173,
+        }
+        response = self.client.post("/api/v1/properties/bulk/", [item], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        imported = Property.objects.get(name="Imported")
+        self.assertEqual(imported.geohash, geo.encode(55.7558, 37.6173))
+
+    def _create_described(self, name, description, city="Search City"):
+        return Property.objects.create(
+            name=name,
+            description=description,
+            property_type="apartment",
+            address="1 Street",
+            city=city,
+            country="Test Country",
+            owner=self.user,
+            price_per_night=100.0,
+            max_guests=2,
+            bedrooms=1,
+            bathrooms=1,
+        )
+
+    def test_search_properties(self):
+        in_description = self._create_described("Flat", "Sea view from the balcony")
+        in_name = self._create_described("Sea view loft", "Quiet street")
+        self._create_described("Уютная квартира", "Рядом с парком")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/properties/", {"q": "sea VIEW"})
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]],
+            [in_name.id, in_description.id],
+        )
+
+        response = self.client.get("/api/v1/properties/", {"q": "балк"})
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get("/api/v1/properties/", {"q": "кварт"})
+        self.assertEqual(
+            [row["name"] for row in response.data["results"]], ["Уютная квартира"]
+        )
+        response = self.client.get("/api/v1/properties/", {"q": '"view*'})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get("/api/v1/properties/", {"q": "!!!"})
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get("/api/v1/properties/", {"q": " "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_index_follows_changes(self):
+        place = self._create_described("Garden house", "Roses")
+        url = "/api/v1/properties/"
+        self.assertEqual(len(self.client.get(url, {"q": "roses"}).data["results"]), 1)
+
+        place.description = "Tulips"
+        with self.captureOnCommitCallbacks(execute=True):
+            place.save()
+        self.assertEqual(self.client.get(url, {"q": "roses"}).data["results"], [])
+        self.assertEqual(len(self.client.get(url, {"q": "tulips"}).data["results"]), 1)
+
+        Property.objects.filter(pk=place.pk).update(city="Lisbon")
+        self.assertEqual(len(self.client.get(url, {"q": "lisbon"}).data["results"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place.delete()
+        self.assertEqual(self.client.get(url, {"q": "tulips"}).data["results"], [])
+
+    def test_search_pagination(self):
+        for i in range(5):
+            self._create_described(f"Cabin {i}", "cabin " * (i + 1))
+        seen = []
+        params = {"q": "cabin", "page_size": 2}
+        response = self.client.get("/api/v1/properties/", params)
+        while True:
+            seen.extend(row["name"] for row in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(sorted(seen), [f"Cabin {i}" for i in range(5)])
+        self.assertEqual(len(seen), 5)
+
+    def test_rebuild_search_index(self):
+        self._create_described("Rebuilt", "Indexed text")
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        response = self.client.get("/api/v1/properties/", {"q": "indexed"})
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Rebuilt"])
+
+    def test_property_response_cache(self):
+        url = f"/api/v1/properties/{self.property.id}/"
+        before = response_cache.stats.snapshot()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["average_rating"], 5.0)
+        after = response_cache.stats.snapshot()
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+        self.client.get("/api/v1/properties/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/reviews/",
+                {
+                    "property": self.property.id,
+                    "user": self.user.id,
+                    "rating": 1,
+                    "comment": "Bad",
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["average_rating"], 3.0)
+        response = self.client.get("/api/v1/properties/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["average_rating"], 3.0)
+
+    def test_property_cache_invalidated_by_property_and_owner(self):
+        url = f"/api/v1/properties/{self.property.id}/"
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {"name": "Renamed"})
+        response = self.client.get(url)
+        self.assertEqual(response.data["name"], "Renamed")
+
+        self.user.email = "owner@example.com"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+    def test_property_cache_bumped_after_commit(self):
+        url = f"/api/v1/properties/{self.property.id}/"
+        self.client.get(url)
+        stale, _ = response_cache.lookup_detail(self.property.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/v1/reviews/{self.review.id}/")
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            # параллельный GET между сигналом и коммитом: строка из снимка
+            # до удаления сохраняется под текущей версией
+            _, version = response_cache.lookup_detail(self.property.id)
+            response_cache.store_detail(self.property.id, version, stale)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["average_rating"], 0)
+
+    def test_date_filtered_list_cache_follows_bookings(self):
+        dates = {"check_in": "2030-05-01", "check_out": "2030-05-04"}
+        url = "/api/v1/properties/"
+        self.assertEqual(self.client.get(url, dates)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        booking = {
+            "property": self.property.id,
+            "user": self.user.id,
+            "check_in_date": "2030-05-02",
+            "check_out_date": "2030-05-03",
+            "guests_count": 1,
+            "status": "confirmed",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/v1/bookings/", booking)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(url, dates)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotIn(
+            self.property.id, [row["id"] for row in response.data["results"]]
+        )
+        # список без дат от броней не зависит
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        booking["check_in_date"], booking["check_out_date"] = "2030-05-03", "2030-05-04"
+        self.assertEqual(self.client.get(url, dates)["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/bookings/bulk/", [booking], format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(url, dates)["X-Cache"], "MISS")
+
     # ---------- Booking Tests ----------
     def test_create_booking(self):
         data = {
@@ -120,6 +688,356 @@ class BookingAPITestCase(TestCase):
         response = self.client.delete(f"/api/v1/bookings/{self.booking.id}/")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_booking_list_keyset_pagination(self):
+        for i in range(9):
+            Booking.objects.create(
+                property=self.property,
+                user=self.user,
+                check_in_date=date(2025, 3, 1),
+                check_out_date=date(2025, 3, 2),
+                guests_count=1,
+                total_price=100.0,
+            )
+        # одинаковый created_at: порядок должен держаться на id
+        Booking.objects.filter(pk__in=Booking.objects.order_by("pk")[:6]).update(
+            created_at=self.booking.created_at
+        )
+        expected = list(
+            Booking.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+        seen = []
+        url = "/api/v1/bookings/?page_size=3"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn("COUNT(", queries[0]["sql"].upper())
+            self.assertNotIn("OFFSET", queries[0]["sql"].upper())
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], expected[-4:-1]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/bookings/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_bookings(self):
+        stranger = User.objects.create_user(username="stranger", password="pass")
+        foreign = Property.objects.create(
+            name="Foreign",
+            description="Not mine",
+            property_type="house",
+            address="2 Street",
+            city="Other City",
+            country="Test Country",
+            owner=stranger,
+            price_per_night=70.0,
+            max_guests=2,
+            bedrooms=1,
+            bathrooms=1,
+        )
+        Booking.objects.create(
+            property=foreign,
+            user=self.user,
+            check_in_date=date(2025, 4, 1),
+            check_out_date=date(2025, 4, 2),
+            guests_count=1,
+            total_price=70.0,
+        )
+
+        response = self.client.get("/api/v1/bookings/export/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(
+            json.loads(lines[0]),
+            json.loads(json.dumps(BookingSerializer(self.booking).data)),
+        )
+
+        response = self.client.get("/api/v1/bookings/export/", {"file_format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(
+            csv.reader(io.StringIO(b"".join(response.streaming_content).decode()))
+        )
+        self.assertEqual(rows[0][0], "id")
+        self.assertEqual(rows[1][0], str(self.booking.id))
+        self.assertEqual(len(rows), 2)
+
+    def test_export_reviews(self):
+        response = self.client.get("/api/v1/reviews/export/", {"file_format": "csv"})
+        rows = list(
+            csv.reader(io.StringIO(b"".join(response.streaming_content).decode()))
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertIn("Great place!", rows[1])
+
+        response = self.client.get("/api/v1/reviews/export/", {"file_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_bookings(self):
+        items = [
+            {
+                "property": self.property.id,
+                "user": self.user.id,
+                "check_in_date": f"2025-05-{day:02d}",
+                "check_out_date": f"2025-05-{day + 1:02d}",
+                "guests_count": 2,
+                "total_price": "100.00",
+                "status": "confirmed",
+            }
+            for day in range(1, 21)
+        ]
+        # плюс SELECT ... FOR UPDATE жилья перед проверкой пересечений
+        with self.assertNumQueries(8):
+            response = self.client.post("/api/v1/bookings/bulk/", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 20)
+        self.assertEqual(
+            Booking.objects.filter(pk__in=response.data["ids"]).count(), 20
+        )
+
+    def test_bulk_create_bookings_reports_errors_per_item(self):
+        Booking.objects.create(
+            property=self.property,
+            user=self.user,
+            check_in_date=date(2025, 6, 10),
+            check_out_date=date(2025, 6, 15),
+            guests_count=2,
+            total_price=500.0,
+            status="confirmed",
+        )
+        base = {
+            "property": self.property.id,
+            "user": self.user.id,
+            "guests_count": 2,
+            "total_price": "100.00",
+            "status": "confirmed",
+        }
+        items = [
+            {**base, "check_in_date": "2025-06-01", "check_out_date": "2025-06-03"},
+            {**base, "check_in_date": "2025-06-12", "check_out_date": "2025-06-13"},
+            {**base, "check_in_date": "2025-06-05", "check_out_date": "2025-06-04"},
+            {**base, "property": 0, "check_in_date": "2025-06-01"},
+            {**base, "check_in_date": "2025-06-02", "check_out_date": "2025-06-04"},
+        ]
+        count = Booking.objects.count()
+        response = self.client.post("/api/v1/bookings/bulk/", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("property", response.data[3])
+        self.assertTrue(all(response.data[i] for i in (2, 3)))
+
+        # пересечения проверяются после полей: убираем ошибочные
+        response = self.client.post(
+            "/api/v1/bookings/bulk/", [items[0], items[1], items[4]], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("non_field_errors", response.data[1])
+        self.assertIn("non_field_errors", response.data[2])
+        self.assertEqual(Booking.objects.count(), count)
+
+    def test_bulk_create_properties(self):
+        items = [
+            {
+                "name": f"Imported {i}",
+                "description": "Imported",
+                "property_type": "hotel",
+                "address": "3 Street",
+                "city": "Import City",
+                "country": "Test Country",
+                "owner": self.user.id,
+                "price_per_night": "90.00",
+                "max_guests": 2,
+                "bedrooms": 1,
+                "bathrooms": 1,
+            }
+            for i in range(30)
+        ]
+        response = self.client.post("/api/v1/properties/bulk/", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Property.objects.filter(city="Import City").count(), 30)
+
+    def test_create_booking_rejects_overlap(self):
+        data = {
+            "property": self.property.id,
+            "user": self.user.id,
+            "check_in_date": "2025-03-01",
+            "check_out_date": "2025-03-05",
+            "guests_count": 3,
+            "total_price": 500.0,
+            "status": "confirmed",
+        }
+        response = self.client.post("/api/v1/bookings/", data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        data.update(check_in_date="2025-03-04", check_out_date="2025-03-06")
+        response = self.client.post("/api/v1/bookings/", data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+
+        data["status"] = "pending"
+        response = self.client.post("/api/v1/bookings/", data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_booking_total_price_is_computed(self):
+        data = {
+            "property": self.property.id,
+            "user": self.user.id,
+            "check_in_date": "2025-03-01",
+            "check_out_date": "2025-03-05",
+            "guests_count": 3,
+            "total_price": 1.0,
+        }
+        response = self.client.post("/api/v1/bookings/", data)
+        self.assertEqual(response.data["total_price"], "400.00")
+
+        response = self.client.patch(
+            f"/api/v1/bookings/{response.data['id']}/", {"check_out_date": "2025-03-03"}
+        )
+        self.assertEqual(response.data["total_price"], "200.00")
+
+    def test_quote(self):
+        # 2025-03-01 — суббота
+        PriceRule.objects.create(
+            property=self.property,
+            kind="season",
+            start_date=date(2025, 3, 3),
+            end_date=date(2025, 3, 5),
+            percent=50,
+        )
+        PriceRule.objects.create(
+            property=self.property, kind="weekday", weekday=5, percent=10
+        )
+        PriceRule.objects.create(
+            property=self.property, kind="stay", min_nights=3, percent=-5
+        )
+        PriceRule.objects.create(
+            property=self.property, kind="stay", min_nights=7, percent=-20
+        )
+        items = [
+            {
+                "property": self.property.id,
+                "check_in_date": start,
+                "check_out_date": end,
+            }
+            for start, end in [
+                ("2025-03-01", "2025-03-03"),
+                ("2025-03-02", "2025-03-06"),
+                ("2025-03-01", "2025-03-08"),
+            ]
+        ]
+        items.append({**items[0], "property": 0})
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                "/api/v1/properties/quote/", items, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["nights"], row["total_price"]) for row in response.data],
+            [
+                (2, "210.00"),
+                # 100 + 150 + 150 + 100, скидка 5%
+                (4, "475.00"),
+                # 110 + 100 + 150 + 150 + 100 + 100 + 100, скидка 20%
+                (7, "648.00"),
+                (2, None),
+            ],
+        )
+
+    def test_price_rule_requires_kind_fields(self):
+        cases = [
+            ({"kind": "season", "start_date": date(2025, 3, 1)}, "end_date"),
+            (
+                {
+                    "kind": "season",
+                    "start_date": date(2025, 3, 5),
+                    "end_date": date(2025, 3, 1),
+                },
+                "end_date",
+            ),
+            ({"kind": "weekday"}, "weekday"),
+            ({"kind": "stay"}, "min_nights"),
+        ]
+        for fields, error in cases:
+            rule = PriceRule(property=self.property, percent=10, **fields)
+            with self.assertRaises(DjangoValidationError) as raised:
+                rule.full_clean()
+            self.assertIn(error, raised.exception.message_dict)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                rule.save()
+        self.assertFalse(PriceRule.objects.exists())
+
+    def test_price_above_total_price_column(self):
+        self.property.price_per_night = Decimal("90000000.00")
+        self.property.save()
+        PriceRule.objects.create(
+            property=self.property, kind="stay", min_nights=1, percent=500
+        )
+        item = {
+            "property": self.property.id,
+            "check_in_date": "2025-03-01",
+            "check_out_date": "2025-03-02",
+        }
+        response = self.client.post("/api/v1/properties/quote/", [item], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data[0]["total_price"])
+
+        booking = {**item, "user": self.user.id, "guests_count": 1}
+        count = Booking.objects.count()
+        response = self.client.post("/api/v1/bookings/", booking, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post("/api/v1/bookings/bulk/", [booking], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data[0])
+        self.assertEqual(Booking.objects.count(), count)
+
+    def test_conditional_get_booking_detail(self):
+        url = f"/api/v1/bookings/{self.booking.id}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.patch(url, {"status": "confirmed"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        response = self.client.patch(url, {"status": "cancelled"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, "confirmed")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_conditional_get_lists(self):
+        for url in ("/api/v1/bookings/", "/api/v1/reviews/", "/api/v1/properties/"):
+            etag = self.client.get(url)["ETag"]
+            with self.assertNumQueries(1 if "properties" not in url else 0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = self.client.get("/api/v1/reviews/")["ETag"]
+        self.client.patch(f"/api/v1/reviews/{self.review.id}/", {"rating": 2})
+        response = self.client.get("/api/v1/reviews/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     # ---------- Review Tests ----------
     def test_create_review(self):
         data = {
@@ -149,3 +1067,893 @@ class BookingAPITestCase(TestCase):
     def test_delete_review(self):
         response = self.client.delete(f"/api/v1/reviews/{self.review.id}/")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    # ---------- Rating Tests ----------
+    def test_average_rating_follows_reviews(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(
+                property=self.property, user=self.user, rating=2, comment="So-so"
+            )
+        response = self.client.get(f"/api/v1/properties/{self.property.id}/")
+        self.assertEqual(response.data["average_rating"], 3.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/v1/reviews/{review.id}/", {"rating": 4})
+        response = self.client.get(f"/api/v1/properties/{self.property.id}/")
+        self.assertEqual(response.data["average_rating"], 4.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/v1/reviews/{review.id}/")
+            self.client.delete(f"/api/v1/reviews/{self.review.id}/")
+        response = self.client.get(f"/api/v1/properties/{self.property.id}/")
+        self.assertEqual(response.data["average_rating"], 0)
+
+    def test_property_list_query_count(self):
+        for i in range(10):
+            prop = Property.objects.create(
+                name=f"Property {i}",
+                description="Bulk",
+                property_type="house",
+                address="1 Street",
+                city="Test City",
+                country="Test Country",
+                owner=self.user,
+                price_per_night=50.0,
+                max_guests=2,
+                bedrooms=1,
+                bathrooms=1,
+            )
+            for rating in (1, 3, 5):
+                Review.objects.create(
+                    property=prop, user=self.user, rating=rating, comment="ok"
+                )
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/properties/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 11)
+        self.assertEqual(response.data["results"][0]["average_rating"], 3.0)
+
+    def test_server_timing_header(self):
+        url = f"/api/v1/bookings/{self.booking.id}/"
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        timing = dict(
+            entry.split(";", 1) for entry in response["Server-Timing"].split(", ")
+        )
+        self.assertEqual(set(timing), {"db", "serialize", "render", "total"})
+        self.assertIn(f'desc="{len(captured)} queries"', timing["db"])
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint(self):
+        self.client.get("/api/v1/reviews/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn(
+            'api_request_duration_seconds_count{route="review-list",method="GET"}',
+            body,
+        )
+        self.assertIn(
+            'api_request_db_queries_bucket{route="review-list",method="GET",le="+Inf"}',
+            body,
+        )
+        self.assertIn(
+            'api_responses_total{route="review-list",method="GET",status="200"}', body
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_metrics_closed_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    def test_profiler_signed_header(self):
+        url = f"/api/v1/bookings/{self.booking.id}/"
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PROFILER_ENABLED=True, PROFILER_DIR=directory):
+                client = APIClient()
+                client.force_authenticate(user=self.user)
+                self.assertNotIn("X-Profile-Id", client.get(url))
+                response = client.get(url, HTTP_X_PROFILE="profile:bad:signature")
+                self.assertNotIn("X-Profile-Id", response)
+                response = client.get(url, HTTP_X_PROFILE=profiling.make_token())
+            profile_id = response["X-Profile-Id"]
+            summary = (Path(directory) / f"{profile_id}.txt").read_text()
+            self.assertTrue((Path(directory) / f"{profile_id}.prof").exists())
+        self.assertIn("route: booking-detail", summary)
+        self.assertIn("sql: 1 queries", summary)
+        self.assertIn("cumulative", summary)
+
+    def test_cached_schema(self):
+        client = APIClient()
+        reference = SpectacularAPIView.as_view()
+        factory = RequestFactory()
+        schema._loaded.clear()
+        self.addCleanup(schema._loaded.clear)
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(SCHEMA_DIR=directory):
+                with mock.patch.object(schema, "build", wraps=schema.build) as build:
+                    for params, headers in (
+                        ({}, {}),
+                        ({"format": "json"}, {}),
+                        ({}, {"HTTP_ACCEPT": "application/vnd.oai.openapi+json"}),
+                    ):
+                        response = client.get("/api/schema/", params, **headers)
+                        expected = reference(
+                            factory.get("/api/schema/", params, **headers)
+                        )
+                        expected.render()
+                        self.assertEqual(response.content, expected.content)
+                        for header in ("Content-Type", "Content-Disposition"):
+                            self.assertEqual(response[header], expected[header])
+                    self.assertEqual(build.call_count, 1)
+
+                    for header in ("gzip;q=0", "br, *;q=0", "deflate", "gzip;q=x"):
+                        response = client.get(
+                            "/api/schema/", HTTP_ACCEPT_ENCODING=header
+                        )
+                        self.assertNotIn("Content-Encoding", response)
+                    for header in ("br;q=1, GZIP; q=0.5", "*"):
+                        response = client.get(
+                            "/api/schema/", HTTP_ACCEPT_ENCODING=header
+                        )
+                        self.assertEqual(response["Content-Encoding"], "gzip")
+                    response = client.get("/api/schema/", HTTP_ACCEPT_ENCODING="gzip")
+                    self.assertEqual(response["Content-Encoding"], "gzip")
+                    self.assertIn("Accept-Encoding", response["Vary"])
+                    plain = client.get("/api/schema/")
+                    self.assertEqual(gzip.decompress(response.content), plain.content)
+                    self.assertNotEqual(response["ETag"], plain["ETag"])
+                    response = client.get(
+                        "/api/schema/", HTTP_IF_NONE_MATCH=plain["ETag"]
+                    )
+                    self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+                    # другой процесс той же версии читает готовые файлы
+                    schema._loaded.clear()
+                    client.get("/api/schema/")
+                    self.assertEqual(build.call_count, 1)
+                    # изменение кода — новая версия и новая схема
+                    schema._loaded.clear()
+                    with mock.patch.object(
+                        schema, "schema_version", return_value="new"
+                    ):
+                        client.get("/api/schema/")
+                    self.assertEqual(build.call_count, 2)
+                self.assertEqual(
+                    sorted(path.name for path in Path(directory).iterdir()),
+                    ["openapi-new.json", "openapi-new.yaml"],
+                )
+
+    def test_profiler_sampling(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(
+                PROFILER_ENABLED=True, PROFILER_DIR=directory, PROFILER_SAMPLE_RATE=1
+            ):
+                client = APIClient()
+                client.force_authenticate(user=self.user)
+                response = client.get("/api/v1/reviews/")
+            self.assertIn("X-Profile-Id", response)
+            self.assertEqual(len(list(Path(directory).iterdir())), 2)
+
+    def test_schema_version_covers_project_sources(self):
+        files = {
+            Path(path).relative_to(settings.BASE_DIR).as_posix()
+            for path in schema._source_files()
+        }
+        self.assertTrue(
+            {
+                "booking/filters.py",
+                "core/pagination.py",
+                "users/authentication.py",
+                "users/schema.py",
+                "booking/permissions.py",
+            }
+            <= files
+        )
+        self.assertFalse(any("__pycache__" in path for path in files))
+
+    def test_fast_list_matches_serializer(self):
+        located = self._create_located("Located", 55.7558, 37.6173)
+        located.price_per_night = "99.5"
+        located.save()
+        Review.objects.create(property=located, user=self.user, rating=4, comment="")
+        Booking.objects.create(
+            property=located,
+            user=self.user,
+            check_in_date=date(2030, 1, 1),
+            check_out_date=date(2030, 1, 3),
+            guests_count=1,
+            total_price="199.00",
+            status="cancelled",
+        )
+        cases = (
+            ("/api/v1/properties/", PropertyViewSet.queryset, PropertySerializer),
+            ("/api/v1/bookings/", Booking.objects.all(), BookingSerializer),
+            ("/api/v1/reviews/", Review.objects.all(), ReviewSerializer),
+        )
+        for url, queryset, serializer_class in cases:
+            with self.subTest(url=url):
+                self.assertIsNotNone(reader_for(serializer_class))
+                response = self.client.get(url, {"page_size": 1})
+                instances = queryset.order_by("-created_at", "-id")[:1]
+                expected = JSONRenderer().render(
+                    {
+                        "next": response.data["next"],
+                        "previous": None,
+                        "results": serializer_class(instances, many=True).data,
+                    }
+                )
+                self.assertEqual(response.content, expected)
+                response = self.client.get(response.data["next"])
+                instances = queryset.order_by("-created_at", "-id")[1:2]
+                self.assertEqual(
+                    JSONRenderer().render(response.data["results"]),
+                    JSONRenderer().render(serializer_class(instances, many=True).data),
+                )
+
+    def test_fast_list_falls_back_for_unsupported_fields(self):
+        class NestedSerializer(ReviewSerializer):
+            property = PropertySerializer(read_only=True)
+
+        self.assertIsNone(reader_for(NestedSerializer))
+
+    def test_sparse_fields_list(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(
+                "/api/v1/properties/",
+                {"fields": "name,city,price_per_night,average_rating,id"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # порядок полей — как в сериализаторе
+        self.assertEqual(
+            list(response.data["results"][0]),
+            ["id", "average_rating", "name", "city", "price_per_night"],
+        )
+        self.assertEqual(response.data["results"][0]["average_rating"], 5)
+        self.assertNotIn("description", captured[-1]["sql"])
+
+        response = self.client.get("/api/v1/bookings/", {"omit": "user,total_price"})
+        self.assertEqual(
+            list(response.data["results"][0]),
+            [
+                "id",
+                "check_in_date",
+                "check_out_date",
+                "guests_count",
+                "status",
+                "created_at",
+                "updated_at",
+                "property",
+            ],
+        )
+
+    def test_sparse_fields_detail(self):
+        url = f"/api/v1/reviews/{self.review.id}/"
+        full = self.client.get(url)
+        with self.assertNumQueries(1), CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, {"fields": "rating"})
+        self.assertEqual(response.data, {"rating": 5})
+        self.assertNotIn("comment", captured[-1]["sql"])
+        self.assertNotEqual(response["ETag"], full["ETag"])
+        response = self.client.get(
+            url, {"fields": "rating"}, HTTP_IF_NONE_MATCH=full["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = f"/api/v1/properties/{self.property.id}/"
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "name,average_rating"})
+        self.assertEqual(response.data, {"name": "Test Property", "average_rating": 5})
+
+    def test_sparse_fields_booking_detail(self):
+        # поля, которые отслеживают сигналы, отложены — post_init их не читает
+        url = f"/api/v1/bookings/{self.booking.id}/"
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "guests_count"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"guests_count": 2})
+
+    def test_deferred_instances_keep_signal_state(self):
+        other = Property.objects.create(
+            name="Other",
+            description="",
+            property_type="house",
+            address="",
+            city="",
+            country="",
+            owner=self.user,
+            price_per_night=50,
+            max_guests=2,
+            bedrooms=1,
+            bathrooms=1,
+        )
+        review = Review.objects.only("rating").get(pk=self.review.pk)
+        review.property = other
+        review.save()
+        self.property.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.property.average_rating, 0)
+        self.assertEqual(other.average_rating, 5)
+        Review.objects.only("rating").get(pk=self.review.pk).delete()
+        other.refresh_from_db()
+        self.assertEqual(other.average_rating, 0)
+
+        Booking.objects.filter(pk=self.booking.pk).update(status="confirmed")
+        booking = Booking.objects.only("guests_count").get(pk=self.booking.pk)
+        self.assertIs(booking._original_occupancy, signals.UNKNOWN)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.guests_count = 3
+            booking.save()
+        self.assertEqual(
+            booking._original_occupancy,
+            (self.property.pk, self.booking.check_in_date, self.booking.check_out_date),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.only("guests_count").get(pk=self.booking.pk).delete()
+        self.assertFalse(Booking.objects.exists())
+
+    def test_sparse_fields_unknown(self):
+        response = self.client.get("/api/v1/properties/", {"fields": "name,secret"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", str(response.data["fields"]))
+
+    def test_orjson_renderer_matches_drf(self):
+        data = {
+            "price": Decimal("10.50"),
+            "date": date(2025, 1, 2),
+            "utc": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            "offset": datetime(
+                2025, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=3))
+            ),
+            "naive": datetime(2025, 1, 2, 3, 4, 5),
+            "time": time(12, 30),
+            "duration": timedelta(hours=1),
+            "uuid": uuid.UUID(int=1),
+            "lazy": gettext_lazy("Текст"),
+            "separators": "a\u2028b\u2029c",
+            "list": ReturnList([1, 2.5, None, True], serializer=None),
+            "tuple": ("x", "y"),
+            1: "int key",
+        }
+        renderer = renderers.ORJSONRenderer()
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            renderer.render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+        self.assertEqual(renderer.render(None), b"")
+        for value in (1e-07, 1e-05, 1e16, -2.5e20, 0.0001, 0.0, 55.7558):
+            data = {"latitude": value, "list": [value]}
+            self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        for value in (float("nan"), float("inf")):
+            with self.assertRaises(ValueError):
+                renderer.render({"distance_km": value, "name": None})
+
+        for url in ("/api/v1/properties/", "/api/v1/bookings/", "/api/v1/reviews/"):
+            response = self.client.get(url)
+            self.assertIsInstance(response.accepted_renderer, renderers.ORJSONRenderer)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+            self.assertIn("Accept", response["Vary"])
+
+    @skipUnless(renderers.msgpack, "msgpack не установлен")
+    def test_msgpack_negotiation(self):
+        import msgpack
+
+        accept = {"HTTP_ACCEPT": "application/msgpack"}
+        url = f"/api/v1/properties/{self.property.id}/"
+        as_json = self.client.get(url)
+        response = self.client.get(url, **accept)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), as_json.json())
+        self.assertNotEqual(response["ETag"], as_json["ETag"])
+        # у каждого формата своя запись кэша ответов
+        self.assertEqual(self.client.get(url, **accept)["X-Cache"], "HIT")
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+
+        response = self.client.get("/api/v1/bookings/", **accept)
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            self.client.get("/api/v1/bookings/").json(),
+        )
+
+        response = self.client.post(
+            "/api/v1/reviews/",
+            msgpack.packb(
+                {
+                    "property": self.property.id,
+                    "user": self.user.id,
+                    "rating": 4,
+                    "comment": "Ок",
+                }
+            ),
+            content_type="application/msgpack",
+            **accept,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)["comment"], "Ок")
+        response = self.client.post(
+            "/api/v1/reviews/", b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seed_bench_data(self):
+        counts = seeding.seed(users=30, properties=40, bookings=200, reviews=50)
+        self.assertEqual(
+            counts, {"users": 30, "properties": 40, "bookings": 200, "reviews": 50}
+        )
+        confirmed = Booking.objects.filter(status="confirmed")
+        for booking in confirmed:
+            self.assertFalse(
+                confirmed.filter(
+                    property=booking.property,
+                    check_in_date__lt=booking.check_out_date,
+                    check_out_date__gt=booking.check_in_date,
+                )
+                .exclude(pk=booking.pk)
+                .exists()
+            )
+        rated = Property.objects.filter(reviews__isnull=False).distinct().first()
+        self.assertEqual(rated.rating_count, rated.reviews.count())
+
+
+class BenchCommandTestCase(TransactionTestCase):
+    def test_bench_scenarios_isolated(self):
+        def failing(size):
+            make_owner()
+            raise RuntimeError("boom")
+
+        def counting(size):
+            return {"users": User.objects.count()}
+
+        command = bench.Command(stdout=io.StringIO(), stderr=io.StringIO())
+        scenarios = {"failing": failing, "counting": counting}
+        with mock.patch.dict(bench.SCENARIOS, scenarios, clear=True):
+            results, failed = command.run_scenarios(["failing", "counting"], 10)
+        self.assertEqual(failed, ["failing"])
+        self.assertEqual(results["failing"], {"error": "RuntimeError: boom"})
+        self.assertEqual(results["counting"], {"users": 0})
+
+
+@override_settings(ROOT_URLCONF="core.urls_asgi", ASYNC_VIEWS=True)
+class AsyncHotPathTestCase(TestCase):
+    def setUp(self):
+        for backend in caches.all():
+            backend.clear()
+        self.user = User.objects.create_user(username="async", password="pass")
+        self.properties = [
+            Property.objects.create(
+                name=f"Async {i}",
+                description="Async",
+                property_type="apartment",
+                address="1 Street",
+                city="Async City",
+                country="Test Country",
+                owner=self.user,
+                price_per_night=100 + i,
+                max_guests=2,
+                bedrooms=1,
+                bathrooms=1,
+            )
+            for i in range(3)
+        ]
+        Review.objects.create(
+            property=self.properties[0], user=self.user, rating=5, comment="Good"
+        )
+        Booking.objects.create(
+            property=self.properties[0],
+            user=self.user,
+            check_in_date=date(2025, 3, 1),
+            check_out_date=date(2025, 3, 5),
+            guests_count=1,
+            total_price=400,
+            status="confirmed",
+        )
+
+    def _sync_get(self, url, params=None):
+        # эталон — обычный путь DRF через core.urls
+        client = APIClient()
+        client.force_login(self.user)
+        with override_settings(ROOT_URLCONF="core.urls"):
+            response = client.get(url, params)
+        for backend in caches.all():
+            backend.clear()
+        return response
+
+    async def _async_get(self, url, params=None, headers=None):
+        await self.async_client.aforce_login(self.user)
+        sync_actions = {"list": mock.DEFAULT, "retrieve": mock.DEFAULT}
+        with mock.patch.multiple(PropertyViewSet, **sync_actions, availability=None):
+            with mock.patch.object(ReviewViewSet, "list") as review_list:
+                response = await self.async_client.get(url, params, headers=headers)
+        review_list.assert_not_called()
+        return response
+
+    async def test_async_responses_match_sync(self):
+        pk = self.properties[0].pk
+        cases = [
+            ("/api/v1/properties/", {"page_size": 2}),
+            ("/api/v1/properties/", {"city": "Async City", "max_price": "101"}),
+            (f"/api/v1/properties/{pk}/", None),
+            (
+                f"/api/v1/properties/{pk}/availability/",
+                {"start_date": "2025-03-04", "end_date": "2025-03-06"},
+            ),
+            (
+                f"/api/v1/properties/{pk}/availability/",
+                {"start_date": "2025-03-05", "end_date": "2025-03-06"},
+            ),
+            ("/api/v1/reviews/", None),
+        ]
+        for url, params in cases:
+            expected = await sync_to_async(self._sync_get)(url, params)
+            response = await self._async_get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response["Content-Type"], expected["Content-Type"])
+            self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    async def test_async_conditional_and_cached(self):
+        url = f"/api/v1/properties/{self.properties[1].pk}/"
+        response = await self._async_get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        response = await self._async_get(
+            url, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        response = await self._async_get("/api/v1/reviews/")
+        response = await self._async_get(
+            "/api/v1/reviews/", headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_token_auth(self):
+        url = "/api/v1/reviews/"
+        expected = await sync_to_async(self._sync_get)(url)
+        token = await sync_to_async(make_token)(self.user)
+        with mock.patch.object(ReviewViewSet, "list") as review_list:
+            response = await self.async_client.get(
+                url, headers={"Authorization": f"Bearer {token}"}
+            )
+        review_list.assert_not_called()
+        self.assertEqual(response.content, expected.content)
+
+        # недействительный токен отклоняет обычное представление
+        response = await self.async_client.get(
+            url, headers={"Authorization": f"Bearer {token}x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_async_fallback_to_sync_views(self):
+        # ошибки, запись и анонимный доступ к отзывам обслуживает DRF
+        pk = self.properties[0].pk
+        response = await self.async_client.get(
+            f"/api/v1/properties/{pk}/availability/", {"start_date": "2025-03-05"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get("/api/v1/properties/999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get("/api/v1/reviews/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            "/api/v1/reviews/",
+            {
+                "property": self.properties[1].pk,
+                "user": self.user.pk,
+                "rating": 4,
+                "comment": "Fine",
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    async def _served_by_sync_view(self, url, params=None):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(PropertyViewSet, "alist") as alist:
+            response = await self.async_client.get(url, params)
+        alist.assert_not_called()
+        return response
+
+    @override_settings(ASYNC_VIEWS=False)
+    async def test_async_path_disabled(self):
+        response = await self._served_by_sync_view("/api/v1/properties/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_async_throttled_views_fall_back(self):
+        class Throttle(UserRateThrottle):
+            rate = "1/min"
+
+        with mock.patch.object(PropertyViewSet, "throttle_classes", [Throttle]):
+            response = await self._served_by_sync_view("/api/v1/properties/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = await self._served_by_sync_view("/api/v1/properties/")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    async def test_async_versioning(self):
+        class Versioning(QueryParameterVersioning):
+            allowed_versions = ("1",)
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(PropertyViewSet, "versioning_class", Versioning):
+            response = await self.async_client.get(
+                "/api/v1/properties/", {"version": "1"}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = await self.async_client.get(
+                "/api/v1/properties/", {"version": "2"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaRouterTestCase(SimpleTestCase):
+    def route(self, request, write=False):
+        seen = {}
+
+        def view(request):
+            if write:
+                router.db_for_write(Booking)
+            seen["db"] = Property.objects.all().db
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return seen["db"], response
+
+    def test_safe_request_reads_replica(self):
+        db, response = self.route(RequestFactory().get("/api/v1/properties/"))
+        self.assertEqual(db, "replica")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_request_uses_primary_and_pins(self):
+        db, response = self.route(RequestFactory().post("/api/v1/bookings/"))
+        self.assertEqual(db, "default")
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+    def test_pinned_client_reads_primary(self):
+        request = RequestFactory().get("/api/v1/bookings/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        self.assertEqual(self.route(request)[0], "default")
+
+    def test_write_pins_rest_of_request(self):
+        request = RequestFactory().get("/api/v1/bookings/")
+        self.assertEqual(self.route(request, write=True)[0], "default")
+
+    def test_outside_request_reads_primary(self):
+        self.assertEqual(Property.objects.all().db, "default")
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.route(RequestFactory().get("/"))[0], "default")
+        _, response = self.route(RequestFactory().post("/"))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class ReservationConcurrencyTestCase(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="guest", password="pass")
+        self.property = Property.objects.create(
+            name="Contended",
+            description="Race",
+            property_type="apartment",
+            address="1 Street",
+            city="Race City",
+            country="Test Country",
+            owner=self.user,
+            price_per_night=100.0,
+            max_guests=2,
+            bedrooms=1,
+            bathrooms=1,
+        )
+
+    def _race(self, requests):
+        barrier = threading.Barrier(len(requests))
+        results = []
+
+        def reserve(property, check_in_date):
+            barrier.wait()
+            try:
+                reservations.save_booking(
+                    Booking(
+                        property=property,
+                        user=self.user,
+                        check_in_date=check_in_date,
+                        check_out_date=check_in_date + timedelta(days=3),
+                        guests_count=1,
+                        total_price=300.0,
+                        status="confirmed",
+                    )
+                )
+                results.append(True)
+            except reservations.BookingConflict:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reserve, args=args) for args in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_only_one_overlapping_booking_wins(self):
+        start = date(2025, 7, 1)
+        results = self._race(
+            [(self.property, start + timedelta(days=i % 2)) for i in range(200)]
+        )
+        self.assertEqual(len(results), 200)
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_bulk_create_holds_property_locks(self):
+        check_in_date = date(2025, 8, 1)
+        item = {
+            "property": self.property.id,
+            "user": self.user.id,
+            "check_in_date": check_in_date.isoformat(),
+            "check_out_date": (check_in_date + timedelta(days=3)).isoformat(),
+            "guests_count": 1,
+            "status": "confirmed",
+        }
+        inside, results = threading.Event(), {}
+        quote = pricing.quote
+
+        def slow_quote(*args, **kwargs):
+            # одиночная бронь приходит, пока пакет проверен, но не записан
+            inside.set()
+            threading.Event().wait(0.2)
+            return quote(*args, **kwargs)
+
+        def bulk():
+            serializer = BookingSerializer(data=[item], many=True)
+            serializer.is_valid(raise_exception=True)
+            try:
+                with mock.patch.object(pricing, "quote", slow_quote):
+                    serializer.save()
+                results["bulk"] = True
+            except ValidationError:
+                results["bulk"] = False
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=bulk)
+        thread.start()
+        self.assertTrue(inside.wait(5))
+        with self.assertRaises(reservations.BookingConflict):
+            reservations.save_booking(
+                Booking(
+                    property=self.property,
+                    user=self.user,
+                    check_in_date=check_in_date + timedelta(days=1),
+                    check_out_date=check_in_date + timedelta(days=2),
+                    guests_count=1,
+                    total_price=100.0,
+                    status="confirmed",
+                )
+            )
+        thread.join()
+        self.assertEqual(results, {"bulk": True})
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_conditional_update_takes_property_locks_first(self):
+        start = date(2025, 9, 1)
+        booking = Booking.objects.create(
+            property=self.property,
+            user=self.user,
+            check_in_date=start,
+            check_out_date=start + timedelta(days=2),
+            guests_count=1,
+            total_price=200.0,
+            status="confirmed",
+        )
+        url = f"/api/v1/bookings/{booking.id}/"
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        etag = client.get(url)["ETag"]
+        inside, results = threading.Event(), {}
+        price_stay = pricing.price_stay
+        main = threading.current_thread()
+
+        def slow_price_stay(*args):
+            # PATCH уже в транзакции проверки версии, POST приходит за замком
+            if threading.current_thread() is not main:
+                inside.set()
+                threading.Event().wait(0.2)
+            return price_stay(*args)
+
+        def patch():
+            patch_client = APIClient()
+            patch_client.force_authenticate(user=self.user)
+            try:
+                response = patch_client.patch(
+                    url,
+                    {"check_out_date": (start + timedelta(days=3)).isoformat()},
+                    format="json",
+                    HTTP_IF_MATCH=etag,
+                )
+                results["patch"] = response.status_code
+            finally:
+                connection.close()
+
+        with mock.patch.object(pricing, "price_stay", slow_price_stay):
+            thread = threading.Thread(target=patch)
+            thread.start()
+            self.assertTrue(inside.wait(5))
+            response = client.post(
+                "/api/v1/bookings/",
+                {
+                    "property": self.property.id,
+                    "user": self.user.id,
+                    "check_in_date": (start + timedelta(days=10)).isoformat(),
+                    "check_out_date": (start + timedelta(days=12)).isoformat(),
+                    "guests_count": 1,
+                    "status": "confirmed",
+                },
+                format="json",
+            )
+            thread.join()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(results, {"patch": status.HTTP_200_OK})
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_property_locks_are_independent(self):
+        locks = reservations.PropertyLocks()
+
+        def try_hold(property_id, acquired):
+            with locks.hold(property_id):
+                acquired.set()
+
+        with locks.hold(1):
+            other, same = threading.Event(), threading.Event()
+            threading.Thread(target=try_hold, args=(2, other)).start()
+            blocked = threading.Thread(target=try_hold, args=(1, same))
+            blocked.start()
+            self.assertTrue(other.wait(1))
+            self.assertFalse(same.wait(0.1))
+        blocked.join()
+        self.assertTrue(same.is_set())
+        self.assertEqual(locks._locks, {})
+
+
+class StartupProfileTestCase(SimpleTestCase):
+    def loaded(self, settings_module, modules):
+        code = (
+            "import django, sys\n"
+            "django.setup()\n"
+            "from django.urls import resolve\n"
+            "resolve('/api/v1/properties/')\n"
+            "from core import asgi, wsgi\n"
+            f"print(','.join(m for m in {modules!r} if m in sys.modules))\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parent.parent,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return set(filter(None, completed.stdout.strip().split(",")))
+
+    def test_api_profile_skips_schema_and_dev_modules(self):
+        modules = [
+            "drf_spectacular.openapi",
+            "drf_spectacular.views",
+            "django.test",
+            "django_extensions",
+            "core.urls",
+            "cProfile",
+        ]
+        self.assertEqual(self.loaded("core.settings_api", modules), set())
+        self.assertIn("drf_spectacular.openapi", self.loaded("core.settings", modules))
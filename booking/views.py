@@ -1,19 +1,169 @@
+import heapq
 from datetime import date
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
+from core.async_views import AsyncGenericMixin, Fallback
+from core.conditional import ConditionalMixin
+from core.readers import ValuesListMixin
+from core.sparse import SparseFieldsMixin
+
+from .filters import PropertyFilterBackend
 from .models import Property, Booking, Review
 from .permissions import IsOwnerOrReadOnly
-from .serializers import PropertySerializer, BookingSerializer, ReviewSerializer
+from .serializers import (
+    PropertySerializer,
+    BookingSerializer,
+    ReviewSerializer,
+    DateRangeSerializer,
+    BulkAvailabilitySerializer,
+    CalendarSerializer,
+    ExportSerializer,
+    NearbySerializer,
+    QuoteSerializer,
+)
+from .export import stream_export
+from . import geo, occupancy, pricing, reservations, response_cache
+
+
+class BulkCreateMixin:
+    bulk_max_length = 5000
+
+    @extend_schema(responses={201: dict})
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=self.bulk_max_length
+        )
+        serializer.is_valid(raise_exception=True)
+        # транзакцию открывает сам list-сериализатор: брони берут замки
+        # жилья до её начала
+        objects = serializer.save()
+        return Response(
+            {"created": len(objects), "ids": [obj.pk for obj in objects]},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class CachedPropertyMixin:
+    # вместе с данными хранятся валидаторы ConditionalMixin,
+    # поэтому попадание в кэш обслуживает и условные запросы
+    def retrieve(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        entry, version = response_cache.lookup_detail(pk, self._representation())
+        if entry is not None:
+            return self._cached_response(request, entry)
+        response = super().retrieve(request, *args, **kwargs)
+        return self._store_detail(response, pk, version)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        # LocMemCache не делает ввода-вывода, его читаем прямо из цикла событий;
+        # сетевой кэш читает обычное представление в потоке
+        if not response_cache.in_process():
+            raise Fallback
+        if request.query_params:
+            return await super().aretrieve(request, *args, **kwargs)
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        entry, version = response_cache.lookup_detail(pk, self._representation())
+        if entry is not None:
+            return self._cached_response(request, entry)
+        response = await super().aretrieve(request, *args, **kwargs)
+        return self._store_detail(response, pk, version)
+
+    def list(self, request, *args, **kwargs):
+        key = self._list_key(request)
+        entry = response_cache.lookup_list(key)
+        if entry is not None:
+            return self._cached_response(request, entry)
+        return self._store_list(super().list(request, *args, **kwargs), key)
+
+    async def alist(self, request, *args, **kwargs):
+        if not response_cache.in_process():
+            raise Fallback
+        key = self._list_key(request)
+        entry = response_cache.lookup_list(key)
+        if entry is not None:
+            return self._cached_response(request, entry)
+        return self._store_list(await super().alist(request, *args, **kwargs), key)
+
+    def _list_key(self, request):
+        # свободные даты зависят от броней, а не только от жилья
+        return response_cache.list_key(
+            request.build_absolute_uri(),
+            self._representation(),
+            dated="check_in" in request.query_params,
+        )
+
+    def _store_detail(self, response, pk, version):
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.store_detail(
+                pk, version, self._cache_entry(response), self._representation()
+            )
+        response["X-Cache"] = "MISS"
+        return response
+
+    def _store_list(self, response, key):
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.store_list(key, self._cache_entry(response))
+        response["X-Cache"] = "MISS"
+        return response
 
+    def _representation(self):
+        return self.request.accepted_renderer.format
 
-class PropertyViewSet(ModelViewSet):
-    queryset = Property.objects.all()
+    def _cache_entry(self, response):
+        return (
+            response.data,
+            response["ETag"],
+            parse_http_date_safe(response.get("Last-Modified")),
+        )
+
+    def _cached_response(self, request, entry):
+        data, etag, last_modified = entry
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = Response(data)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        response["X-Cache"] = "HIT"
+        return response
+
+
+class PropertyViewSet(
+    CachedPropertyMixin,
+    SparseFieldsMixin,
+    ValuesListMixin,
+    ConditionalMixin,
+    AsyncGenericMixin,
+    BulkCreateMixin,
+    ModelViewSet,
+):
+    queryset = Property.objects.with_average_rating()
     serializer_class = PropertySerializer
     permission_classes = (IsOwnerOrReadOnly,)
+    filter_backends = (PropertyFilterBackend,)
+    async_actions = ("list", "retrieve", "availability")
+    default_ordering = ("-created_at", "-id")
+    search_ordering = ("search_rank", "-id")
+
+    @property
+    def ordering(self):
+        # с ?q= выдача идёт по релевантности (аннотация search_rank)
+        request = getattr(self, "request", None)
+        if request is not None and request.query_params.get("q"):
+            return self.search_ordering
+        return self.default_ordering
 
     @extend_schema(
         parameters=[
@@ -34,41 +184,280 @@ class PropertyViewSet(ModelViewSet):
         ]
     )
     @action(detail=True, methods=["get"])
-    def availability(self, request, pk=True):
+    def availability(self, request, pk=None):
         property = self.get_object()
-        start_date = request.query_params.get("start_date")
-        end_date = request.query_params.get("end_date")
+        is_availability = not self._blocking_bookings(request, property).exists()
+        return Response({"is_availability": is_availability})
+
+    async def aavailability(self, request, pk=None):
+        property = await self.aget_object()
+        bookings = self._blocking_bookings(request, property)
+        return Response({"is_availability": not await bookings.aexists()})
 
-        if not start_date or not end_date:
-            return Response(
-                {"error": "Требуются значения start_date и end_date"},
-                status=status.HTTP_400_BAD_REQUEST,
+    def _blocking_bookings(self, request, property):
+        dates = DateRangeSerializer(data=request.query_params)
+        dates.is_valid(raise_exception=True)
+        return Booking.objects.filter(property=property).blocking(
+            dates.validated_data["start_date"], dates.validated_data["end_date"]
+        )
+
+    @extend_schema(
+        operation_id="v1_properties_availability_bulk",
+        parameters=[
+            OpenApiParameter(
+                name="start_date",
+                location=OpenApiParameter.QUERY,
+                description="Start_date",
+                required=True,
+                type=date,
+            ),
+            OpenApiParameter(
+                name="end_date",
+                location=OpenApiParameter.QUERY,
+                description="End_date",
+                required=True,
+                type=date,
+            ),
+            OpenApiParameter(
+                name="ids",
+                location=OpenApiParameter.QUERY,
+                description="Property ids, comma separated",
+                required=False,
+                type=str,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="availability")
+    def bulk_availability(self, request):
+        params = BulkAvailabilitySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if "ids" in data:
+            queryset = queryset.filter(pk__in=data["ids"])
+        # один запрос: EXISTS по составному индексу для каждого жилья
+        queryset = queryset.with_availability(
+            data["start_date"], data["end_date"]
+        ).only("id", "created_at")
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        results = [
+            {"property": row.pk, "is_availability": not row.is_booked} for row in rows
+        ]
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="from",
+                location=OpenApiParameter.QUERY,
+                description="First night",
+                required=True,
+                type=date,
+            ),
+            OpenApiParameter(
+                name="to",
+                location=OpenApiParameter.QUERY,
+                description="Night after the last one",
+                required=True,
+                type=date,
+            ),
+        ]
+    )
+    @action(detail=True, methods=["get"])
+    def calendar(self, request, pk=None):
+        params = CalendarSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date = params.validated_data["from"]
+        end_date = params.validated_data["to"]
+
+        # при попадании в кэш обходимся без запросов к БД
+        bitmap = occupancy.cached(pk)
+        if bitmap is None:
+            bitmap = occupancy.build(self.get_object().pk)
+
+        return Response(
+            {
+                "from": start_date,
+                "to": end_date,
+                "occupied": bitmap.window(start_date, end_date),
+            }
+        )
+
+    @extend_schema(
+        request=QuoteSerializer(many=True), responses=QuoteSerializer(many=True)
+    )
+    @action(detail=False, methods=["post"])
+    def quote(self, request):
+        serializer = QuoteSerializer(data=request.data, many=True, max_length=1000)
+        serializer.is_valid(raise_exception=True)
+        stays = [
+            (item["property"], item["check_in_date"], item["check_out_date"])
+            for item in serializer.validated_data
+        ]
+        quotes = [
+            {
+                "property": property_id,
+                "check_in_date": check_in_date,
+                "check_out_date": check_out_date,
+                "nights": (check_out_date - check_in_date).days,
+                "total_price": total_price,
+            }
+            for (property_id, check_in_date, check_out_date), total_price in zip(
+                stays, pricing.quote(stays)
             )
+        ]
+        return Response(QuoteSerializer(quotes, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="lat",
+                location=OpenApiParameter.QUERY,
+                description="Latitude",
+                required=True,
+                type=float,
+            ),
+            OpenApiParameter(
+                name="lon",
+                location=OpenApiParameter.QUERY,
+                description="Longitude",
+                required=True,
+                type=float,
+            ),
+            OpenApiParameter(
+                name="radius_km",
+                location=OpenApiParameter.QUERY,
+                description="Search radius, km (default 10)",
+                required=False,
+                type=float,
+            ),
+            OpenApiParameter(
+                name="limit",
+                location=OpenApiParameter.QUERY,
+                description="Max results (default 20)",
+                required=False,
+                type=int,
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        params = NearbySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        lat, lon = params.validated_data["lat"], params.validated_data["lon"]
+        radius_km = params.validated_data["radius_km"]
 
-        is_availability = not Booking.objects.filter(
-            property=property,
-            check_in_date=start_date,
-            check_out_date=end_date,
-            status="confirmed",
-        ).exists()
+        # SQL отсекает по ячейкам геохеша, точное расстояние считается здесь
+        # по координатам; целиком читаются только limit ближайших объектов
+        candidates = (
+            self.filter_queryset(self.get_queryset())
+            .filter(geo.radius_filter(lat, lon, radius_km))
+            .order_by()
+            .values_list("pk", "latitude", "longitude")
+        )
+        ranked = []
+        for pk, latitude, longitude in candidates:
+            distance = geo.distance_km(lat, lon, latitude, longitude)
+            if distance <= radius_km:
+                ranked.append((distance, pk))
+        nearest = heapq.nsmallest(params.validated_data["limit"], ranked)
+        if not nearest:
+            return Response([])
 
-        return Response({"is_availability": is_availability})
+        properties = self.get_queryset().in_bulk([pk for _, pk in nearest])
+        serializer = self.get_serializer(
+            [properties[pk] for _, pk in nearest], many=True
+        )
+        for row, (distance, _) in zip(serializer.data, nearest):
+            row["distance_km"] = round(distance, 3)
+        return Response(serializer.data)
 
 
 # создания, просмотра, обновления и удаления объявлений
 
 
-class BookingViewSet(ModelViewSet):
+class OwnerExportMixin:
+    export_filename = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                location=OpenApiParameter.QUERY,
+                description="ndjson (default) or csv",
+                required=False,
+                type=str,
+            ),
+        ],
+        responses={200: str},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        params = ExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = (
+            self.get_queryset().filter(property__owner=request.user).order_by("pk")
+        )
+        return stream_export(
+            self.get_serializer(),
+            queryset,
+            params.validated_data["file_format"],
+            self.export_filename,
+        )
+
+
+class BookingViewSet(
+    SparseFieldsMixin,
+    ValuesListMixin,
+    ConditionalMixin,
+    BulkCreateMixin,
+    OwnerExportMixin,
+    ModelViewSet,
+):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    ordering = ("-created_at", "-id")
+    export_filename = "bookings"
+
+    def write_lock(self, request):
+        # save_booking берёт замки прежнего и нового объекта жилья
+        queryset = self._version_queryset()
+        try:
+            property_ids = (
+                set(queryset.values_list("property_id", flat=True))
+                if queryset is not None
+                else set()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            property_ids = set()
+        try:
+            property_ids.add(int(request.data["property"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+        return reservations.held_properties(property_ids)
 
 
 # бронирования жилья, отмены и просмотра бронирований.
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(
+    SparseFieldsMixin,
+    ValuesListMixin,
+    ConditionalMixin,
+    AsyncGenericMixin,
+    OwnerExportMixin,
+    ModelViewSet,
+):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    async_actions = ("list",)
+    ordering = ("-created_at", "-id")
+    export_filename = "reviews"
 
 
 # добавления, редактирования и просмотра отзывов.
@@ -9,8 +9,38 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+
+class APIASGIHandler(ASGIHandler):
+    """ASGI-обработчик: async-маршруты и middleware без перехода в поток.
+
+    При выключенном ASYNC_VIEWS — обычный ASGIHandler.
+    """
+
+    def load_middleware(self, is_async=False):
+        if not settings.ASYNC_VIEWS:
+            return super().load_middleware(is_async)
+
+        from core.middleware import for_asgi
+
+        middleware = settings.MIDDLEWARE
+        settings.MIDDLEWARE = for_asgi(middleware)
+        try:
+            super().load_middleware(is_async)
+        finally:
+            settings.MIDDLEWARE = middleware
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None and settings.ASYNC_VIEWS:
+            request.urlconf = settings.ASGI_URLCONF
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = APIASGIHandler()
@@ -0,0 +1,155 @@
+"""Асинхронный путь для горячих GET-запросов под ASGI.
+
+Маршруты из core.urls_asgi ведут на async-обёртки тех же viewset. Успешный
+GET выполняется в цикле событий: данные читаются асинхронным ORM, кэш
+ответов — напрямую, ответ рендерится здесь же, без sync_to_async вокруг
+всего представления. Заголовок Authorization проверяют классы
+аутентификации с aauthenticate (токены API). Запись, Basic-авторизация,
+браузерный API и любые ошибки уходят в обычное DRF-представление, поэтому
+ответы совпадают с WSGI байт в байт. Туда же уходят представления с
+throttle_classes (счётчики читаются из кэша синхронно) и запросы при
+кэше ответов не в памяти процесса.
+
+Путь включается настройкой ASYNC_VIEWS (по умолчанию выключен): в замерах
+``manage.py bench asgi`` он пока не быстрее WSGI.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import BrowsableAPIRenderer
+
+from . import metrics
+
+
+class AsyncGenericMixin:
+    """Асинхронные аналоги get_object и paginate_queryset.
+
+    async_actions — действия, у которых есть версия a<действие>.
+    """
+
+    async_actions = ()
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+
+class Fallback(Exception):
+    pass
+
+
+async def _aauthenticate(view, drf_request):
+    for authenticator in view.get_authenticators():
+        if isinstance(authenticator, SessionAuthentication):
+            # сессию уже проверил request.auser()
+            continue
+        aauthenticate = getattr(authenticator, "aauthenticate", None)
+        if aauthenticate is None:
+            raise Fallback
+        result = await aauthenticate(drf_request)
+        if result is not None:
+            return result
+    raise Fallback
+
+
+async def _run(callback, request, args, kwargs):
+    if "format" in kwargs:
+        raise Fallback
+    view = callback.cls(**callback.initkwargs)
+    view.action_map = callback.actions
+    for method, action in callback.actions.items():
+        setattr(view, method, getattr(view, action))
+    view.args, view.kwargs = args, kwargs
+    drf_request = view.initialize_request(request, *args, **kwargs)
+    view.request = drf_request
+    view.headers = view.default_response_headers
+    if view.action not in view.async_actions or view.throttle_classes:
+        raise Fallback
+
+    try:
+        # то же, что SessionAuthentication, но без синхронного чтения сессии
+        user = await request.auser()
+        if user.is_active:
+            drf_request.user = user
+        elif "HTTP_AUTHORIZATION" in request.META:
+            drf_request.user, drf_request.auth = await _aauthenticate(view, drf_request)
+        else:
+            drf_request.user = AnonymousUser()
+        view.format_kwarg = None
+        renderer, media_type = view.perform_content_negotiation(drf_request)
+        if isinstance(renderer, BrowsableAPIRenderer):
+            raise Fallback
+        drf_request.accepted_renderer = renderer
+        drf_request.accepted_media_type = media_type
+        # как APIView.initial
+        version, scheme = view.determine_version(drf_request, *args, **kwargs)
+        drf_request.version, drf_request.versioning_scheme = version, scheme
+        view.check_permissions(drf_request)
+        handler = getattr(view, f"a{view.action}")
+        response = await handler(drf_request, *args, **kwargs)
+    except (APIException, Http404):
+        raise Fallback
+
+    response = view.finalize_response(drf_request, response, *args, **kwargs)
+    if not hasattr(response, "render"):
+        return response
+    # обработчик Django отрендерил бы Response через sync_to_async
+    metrics.timed_render(response)
+    rendered = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    return rendered
+
+
+def async_view(callback):
+    sync_view = sync_to_async(callback)
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method == "GET" and settings.ASYNC_VIEWS:
+            try:
+                return await _run(callback, request, args, kwargs)
+            except Fallback:
+                pass
+        return await sync_view(request, *args, **kwargs)
+
+    return view
+
+
+def async_patterns(patterns):
+    """Маршруты роутера DRF с async-обёртками для действий из async_actions."""
+    wrapped = []
+    for pattern in patterns:
+        actions = getattr(pattern.callback, "actions", {})
+        cls = getattr(pattern.callback, "cls", None)
+        if actions.get("get") in getattr(cls, "async_actions", ()):
+            pattern = URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        wrapped.append(pattern)
+    return wrapped
@@ -0,0 +1,234 @@
+from contextlib import nullcontext
+from hashlib import md5
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+READ_CONDITIONS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+WRITE_CONDITIONS = ("HTTP_IF_MATCH", "HTTP_IF_UNMODIFIED_SINCE")
+
+
+def make_etag(*parts):
+    return quote_etag(md5("|".join(map(str, parts)).encode()).hexdigest())
+
+
+def timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(timestamp(last_modified))
+    return response
+
+
+class ConditionalMixin:
+    """ETag / Last-Modified для list и retrieve, If-Match для PUT/PATCH.
+
+    Валидаторы строятся по (id, updated_at) строк, а не по телу ответа:
+    для 304 читается только проекция страницы или одной строки, сериализатор
+    не вызывается. Для 200 валидаторы считаются по уже загруженным строкам.
+
+    alist и aretrieve — те же действия на асинхронном ORM (см. core.async_views).
+    """
+
+    version_field = "updated_at"
+
+    def _has_conditions(self, request, conditions):
+        return any(name in request.META for name in conditions)
+
+    def etag_variant(self):
+        """Части ETag, отличающие представления одной строки (core.sparse)."""
+        # JSON — без добавки, чтобы прежние ETag оставались действительными
+        renderer = getattr(self.request, "accepted_renderer", None)
+        if renderer is None or renderer.format == "json":
+            return ()
+        return (renderer.format,)
+
+    def _detail_etag(self, pk, updated_at):
+        return make_etag(
+            self.queryset.model._meta.label, pk, updated_at, *self.etag_variant()
+        )
+
+    def _list_validators(self, request, rows):
+        keys = [
+            (
+                (row["id"], row[self.version_field])
+                if isinstance(row, dict)
+                else (row.pk, getattr(row, self.version_field))
+            )
+            for row in rows
+        ]
+        etag = make_etag(
+            request.get_full_path(),
+            keys,
+            getattr(self.paginator, "has_next", None),
+            *self.etag_variant(),
+        )
+        last_modified = max((updated_at for _, updated_at in keys), default=None)
+        return etag, last_modified
+
+    def _version_queryset(self, for_update=False):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        if for_update:
+            queryset = queryset.select_for_update()
+        try:
+            return queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).values_list("pk", self.version_field)
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def _current_version(self, for_update=False):
+        queryset = self._version_queryset(for_update)
+        try:
+            return queryset.first() if queryset is not None else None
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    async def _acurrent_version(self):
+        queryset = self._version_queryset()
+        try:
+            return await queryset.afirst() if queryset is not None else None
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def _projection(self, queryset):
+        fields = {field.lstrip("-") for field in getattr(self, "ordering", ())}
+        return queryset.values("id", self.version_field, *fields)
+
+    def _not_modified(self, request, etag, last_modified):
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp(last_modified)
+        )
+        if response is not None:
+            return set_validators(response, etag, last_modified)
+        return None
+
+    def list_queryset(self, queryset):
+        """Выборка строк страницы; см. core.readers.ValuesListMixin."""
+        return queryset
+
+    def list_data(self, rows):
+        return self.get_serializer(rows, many=True).data
+
+    def _list_response(self, request, rows, page):
+        data = self.list_data(rows)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        return set_validators(response, *self._list_validators(request, rows))
+
+    def _detail_response(self, instance):
+        serializer = self.get_serializer(instance)
+        updated_at = getattr(instance, self.version_field)
+        return set_validators(
+            Response(serializer.data),
+            self._detail_etag(instance.pk, updated_at),
+            updated_at,
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self._has_conditions(request, READ_CONDITIONS):
+            projection = self._projection(queryset)
+            rows = self.paginate_queryset(projection)
+            response = self._not_modified(
+                request,
+                *self._list_validators(
+                    request, rows if rows is not None else projection
+                ),
+            )
+            if response is not None:
+                return response
+
+        queryset = self.list_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        return self._list_response(request, rows, page)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self._has_conditions(request, READ_CONDITIONS):
+            projection = self._projection(queryset)
+            rows = await self.apaginate_queryset(projection)
+            if rows is None:
+                rows = [row async for row in projection]
+            response = self._not_modified(
+                request, *self._list_validators(request, rows)
+            )
+            if response is not None:
+                return response
+
+        queryset = self.list_queryset(queryset)
+        page = await self.apaginate_queryset(queryset)
+        rows = page if page is not None else [row async for row in queryset]
+        return self._list_response(request, rows, page)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self._has_conditions(request, READ_CONDITIONS):
+            current = self._current_version()
+            if current is not None:
+                response = self._not_modified(
+                    request, self._detail_etag(*current), current[1]
+                )
+                if response is not None:
+                    return response
+        return self._detail_response(self.get_object())
+
+    async def aretrieve(self, request, *args, **kwargs):
+        if self._has_conditions(request, READ_CONDITIONS):
+            current = await self._acurrent_version()
+            if current is not None:
+                response = self._not_modified(
+                    request, self._detail_etag(*current), current[1]
+                )
+                if response is not None:
+                    return response
+        return self._detail_response(await self.aget_object())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # формат выбирается по Accept (core.renderers)
+        patch_vary_headers(response, ("Accept",))
+        return response
+
+    def write_lock(self, request):
+        """Замки, которые условная запись берёт до транзакции проверки версии.
+
+        При transaction_mode IMMEDIATE транзакция SQLite сразу держит
+        блокировку записи, и ждать внутри неё замков процесса нельзя.
+        """
+        return nullcontext()
+
+    def update(self, request, *args, **kwargs):
+        if not self._has_conditions(request, WRITE_CONDITIONS):
+            response = super().update(request, *args, **kwargs)
+        else:
+            # проверка версии и запись — в одной транзакции с блокировкой строки
+            with self.write_lock(request), transaction.atomic():
+                current = self._current_version(for_update=True)
+                if current is not None:
+                    response = get_conditional_response(
+                        request,
+                        etag=self._detail_etag(*current),
+                        last_modified=timestamp(current[1]),
+                    )
+                    if response is not None:
+                        return response
+                response = super().update(request, *args, **kwargs)
+        instance = self._saved_instance
+        updated_at = getattr(instance, self.version_field)
+        return set_validators(
+            response, self._detail_etag(instance.pk, updated_at), updated_at
+        )
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self._saved_instance = serializer.instance
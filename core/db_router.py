@@ -0,0 +1,88 @@
+"""Чтение с реплик, запись на основную БД.
+
+ReplicaMiddleware помечает безопасные запросы (GET/HEAD/OPTIONS), и
+только в них ReplicaRouter отправляет чтение на одну из
+REPLICA_DATABASES. Всё остальное — запись, запросы внутри транзакции
+на основной БД, management-команды, сигналы вне запроса — идёт в default.
+
+Чтобы пользователь сразу видел свою бронь, после небезопасного запроса
+ставится cookie на REPLICA_PIN_SECONDS, и его чтения это время идут
+в default. Запись посреди безопасного запроса тоже закрепляет остаток
+запроса за default.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = "primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# True — этот запрос может читать с реплики
+_replica_allowed = ContextVar("replica_allowed", default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or not _replica_allowed.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _replica_allowed.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии default, объекты с любой из них совместимы
+        aliases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _replica_allowed.set(self.replica_allowed(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_allowed.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = _replica_allowed.set(self.replica_allowed(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_allowed.reset(token)
+        return self.pin(request, response)
+
+    def replica_allowed(self, request):
+        return request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
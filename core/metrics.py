@@ -0,0 +1,284 @@
+"""Замеры запроса: SQL, сериализация, рендеринг.
+
+ServerTimingMiddleware заводит на запрос набор счётчиков в contextvar —
+он виден и под ASGI, в том числе в потоках sync_to_async. Обёртка
+execute_wrapper на соединениях копит число и время SQL-запросов,
+TimedSerializerMixin — время Serializer.data без SQL внутри него,
+process_template_response — время рендеринга ответа. Итог уходит в
+заголовок Server-Timing и в гистограммы по маршрутам, которые /metrics
+отдаёт в текстовом формате Prometheus. Гистограммы живут в памяти
+процесса: у каждого воркера свои, Prometheus собирает их по отдельности.
+"""
+
+import hmac
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current = ContextVar("request_timings", default=None)
+
+
+class Timings:
+    __slots__ = ("started", "queries", "sql", "serialize", "render", "nested")
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.nested = False
+
+    def header(self, total):
+        return ", ".join(
+            (
+                f'db;dur={self.sql * 1000:.2f};desc="{self.queries} queries"',
+                f"serialize;dur={self.serialize * 1000:.2f}",
+                f"render;dur={self.render * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            )
+        )
+
+
+def current():
+    """Счётчики текущего запроса или None вне ServerTimingMiddleware."""
+    return _current.get()
+
+
+def record_sql(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql += perf_counter() - started
+
+
+def install(connection):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    # соединения потоков sync_to_async и переподключения
+    install(connection)
+
+
+def timed_serialize(build):
+    """Вызывает build() и относит время к сериализации; вложенные не считаются."""
+    timings = _current.get()
+    if timings is None or timings.nested:
+        return build()
+    timings.nested = True
+    sql = timings.sql
+    started = perf_counter()
+    try:
+        return build()
+    finally:
+        timings.nested = False
+        # ленивые запросы внутри сериализации уже учтены в db
+        timings.serialize += perf_counter() - started - (timings.sql - sql)
+
+
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        parent = super()
+        return timed_serialize(lambda: parent.data)
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+def timed_render(response):
+    timings = _current.get()
+    if timings is None:
+        return response.render()
+    started = perf_counter()
+    try:
+        return response.render()
+    finally:
+        timings.render += perf_counter() - started
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # метки -> счётчики по корзинам (последняя — +Inf) и сумма
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [*map(str, self.buckets), "+Inf"]
+        for labels, series in sorted(self.series.items()):
+            prefix = _labels(labels)
+            count = 0
+            for bound, value in zip(bounds, series):
+                count += value
+                lines.append(f'{self.name}_bucket{{{prefix},le="{bound}"}} {count}')
+            lines.append(f"{self.name}_sum{{{prefix}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{prefix}}} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.lock = Lock()
+        self.duration = Histogram(
+            "api_request_duration_seconds", "Время обработки запроса.", SECONDS
+        )
+        self.db = Histogram("api_request_db_seconds", "Время SQL-запросов.", SECONDS)
+        self.queries = Histogram(
+            "api_request_db_queries", "Число SQL-запросов.", QUERIES
+        )
+        self.serialize = Histogram(
+            "api_request_serializer_seconds", "Время сериализации.", SECONDS
+        )
+        self.render = Histogram(
+            "api_request_render_seconds", "Время рендеринга ответа.", SECONDS
+        )
+        self.responses = {}
+
+    def observe(self, route, method, status, timings, total):
+        labels = (("route", route), ("method", method))
+        with self.lock:
+            self.duration.observe(labels, total)
+            self.db.observe(labels, timings.sql)
+            self.queries.observe(labels, timings.queries)
+            self.serialize.observe(labels, timings.serialize)
+            self.render.observe(labels, timings.render)
+            key = (*labels, ("status", str(status)))
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def expose(self):
+        name = "api_responses_total"
+        lines = []
+        with self.lock:
+            for histogram in (
+                self.duration,
+                self.db,
+                self.queries,
+                self.serialize,
+                self.render,
+            ):
+                lines.extend(histogram.expose())
+            lines.append(f"# HELP {name} Число ответов.")
+            lines.append(f"# TYPE {name} counter")
+            for labels, count in sorted(self.responses.items()):
+                lines.append(f"{name}{{{_labels(labels)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    return ",".join(
+        '{}="{}"'.format(
+            key,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in labels
+    )
+
+
+registry = Registry()
+
+
+class ServerTimingMiddleware:
+    """Ставить первым в MIDDLEWARE, чтобы total включал остальные middleware."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # иначе обработчик обернёт метод в sync_to_async
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all():
+            install(connection)
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        # вызывается непосредственно перед response.render()
+        timings = _current.get()
+        if timings is not None:
+            started = perf_counter()
+
+            def rendered(response):
+                timings.render += perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return ServerTimingMiddleware.process_template_response(self, request, response)
+
+    def finish(self, request, response, timings):
+        total = perf_counter() - timings.started
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        registry.observe(route, request.method, response.status_code, timings, total)
+        if getattr(settings, "SERVER_TIMING", True):
+            response["Server-Timing"] = timings.header(total)
+        return response
+
+
+def metrics_view(request):
+    # без METRICS_TOKEN метрики открыты только при DEBUG: маршруты и их
+    # нагрузку посторонним не показываем
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token:
+        allowed = settings.DEBUG
+    else:
+        allowed = hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.expose(), content_type=CONTENT_TYPE)
@@ -0,0 +1,87 @@
+"""Стандартные middleware, которые под ASGI работают прямо в цикле событий.
+
+MiddlewareMixin в асинхронном режиме вызывает process_request и
+process_response через sync_to_async — по два перехода в поток на каждый
+middleware и запрос. Перечисленным здесь ввод-вывод не нужен (сессия
+пишется в БД только при изменении — тогда переход остаётся), поэтому их
+методы вызываются напрямую. Под WSGI поведение не меняется.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import clickjacking, common, csrf, security
+
+
+class InlineMiddlewareMixin:
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, "process_request"):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, "process_response"):
+            response = self.process_response(request, response)
+        return response
+
+
+class SecurityMiddleware(InlineMiddlewareMixin, security.SecurityMiddleware):
+    pass
+
+
+class SessionMiddleware(InlineMiddlewareMixin, sessions.SessionMiddleware):
+    async def __acall__(self, request):
+        self.process_request(request)
+        response = await self.get_response(request)
+        if request.session.modified or settings.SESSION_SAVE_EVERY_REQUEST:
+            return await sync_to_async(self.process_response)(request, response)
+        return self.process_response(request, response)
+
+
+class CommonMiddleware(InlineMiddlewareMixin, common.CommonMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(InlineMiddlewareMixin, csrf.CsrfViewMiddleware):
+    # используется только под ASGI, поэтому process_view можно сделать async
+    async def process_view(self, request, callback, callback_args, callback_kwargs):
+        args = (request, callback, callback_args, callback_kwargs)
+        if request.method in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            return super().process_view(*args)
+        # токен может прийти в теле формы: request.POST читается в потоке
+        return await sync_to_async(super().process_view)(*args)
+
+
+class AuthenticationMiddleware(InlineMiddlewareMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(InlineMiddlewareMixin, messages.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(
+    InlineMiddlewareMixin, clickjacking.XFrameOptionsMiddleware
+):
+    pass
+
+
+INLINE = {
+    f"{base.__module__}.{base.__name__}": f"{__name__}.{cls.__name__}"
+    for cls in (
+        SecurityMiddleware,
+        SessionMiddleware,
+        CommonMiddleware,
+        CsrfViewMiddleware,
+        AuthenticationMiddleware,
+        MessageMiddleware,
+        XFrameOptionsMiddleware,
+    )
+    for base in cls.__bases__[1:]
+}
+
+
+def for_asgi(middleware):
+    """Подменяет известные middleware их inline-версиями, остальные не трогает."""
+    return [INLINE.get(path, path) for path in middleware]
@@ -0,0 +1,171 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по составному ключу сортировки.
+
+    Курсор хранит значения всех полей сортировки последней (или первой)
+    строки страницы, поэтому следующая страница выбирается условием
+    WHERE по индексу, без OFFSET и без COUNT(*). Последнее поле сортировки
+    должно быть уникальным.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Недействительный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._paginate(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page = self._page_queryset(queryset, request, view)
+        return self._paginate([row async for row in page])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, "ordering", None) or self.ordering)
+        self.page_size = self.get_page_size(request)
+        self.reverse, self.position = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            try:
+                queryset = queryset.filter(self._after(ordering, self.position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[: self.page_size + 1]
+
+    def _paginate(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        self.first_key = self._key(rows[0]) if rows else self.position
+        self.last_key = self._key(rows[-1]) if rows else self.position
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(False, self.last_key)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(True, self.first_key)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            reverse, position = json.loads(b64decode(encoded.encode("ascii")))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(reverse), position
+
+    def encode_cursor(self, reverse, position):
+        cursor = json.dumps([int(reverse), position], default=self._json_default)
+        encoded = b64encode(cursor.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _key(self, row):
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    @staticmethod
+    def _json_default(value):
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        raise TypeError(f"Unsupported cursor value: {value!r}")
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _after(ordering, position):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,104 @@
+"""Профилирование отдельных запросов через cProfile.
+
+Включается PROFILER_ENABLED; иначе middleware выбрасывает
+MiddlewareNotUsed и в цепочке обработки его нет вовсе. Профилируется
+запрос с подписанным заголовком X-Profile (токен выдаёт
+``manage.py profile_token``) либо случайная доля PROFILER_SAMPLE_RATE.
+Для каждого такого запроса в PROFILER_DIR пишутся <id>.prof для
+pstats/snakeviz и <id>.txt — маршрут, время, число SQL-запросов и
+top-N функций по cumulative time. id возвращается в заголовке
+X-Profile-Id.
+
+Middleware синхронный: под ASGI при включённом профилировании запросы
+идут через поток, а профиль охватывает только его.
+"""
+
+import io
+import random
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+HEADER = "X-Profile"
+SALT = "core.profiling"
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign("profile")
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class ProfilerMiddleware:
+    """Ставить сразу после ServerTimingMiddleware — оттуда берётся число SQL."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILER_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        token = request.headers.get(HEADER)
+        if not (token and valid_token(token)) and not (
+            random.random() < settings.PROFILER_SAMPLE_RATE
+        ):
+            return self.get_response(request)
+
+        # cProfile и pstats нужны только выбранным запросам, не старту воркера
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # в потоке уже работает другой профилировщик
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.dump(profile_id, profiler, request, response, elapsed)
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    def dump(self, profile_id, profiler, request, response, elapsed):
+        profiler.dump_stats(self.directory / f"{profile_id}.prof")
+        match = request.resolver_match
+        timings = metrics.current()
+        summary = io.StringIO()
+        summary.write(
+            f"route: {match.view_name if match else 'unmatched'}\n"
+            f"request: {request.method} {request.get_full_path()}\n"
+            f"status: {response.status_code}\n"
+            f"time: {elapsed * 1000:.2f} ms\n"
+        )
+        if timings is not None:
+            summary.write(
+                f"sql: {timings.queries} queries, {timings.sql * 1000:.2f} ms\n"
+            )
+        summary.write("\n")
+        import pstats
+
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILER_TOP)
+        (self.directory / f"{profile_id}.txt").write_text(summary.getvalue())
@@ -0,0 +1,202 @@
+"""Быстрое чтение списков: строки values() -> словари ответа.
+
+ModelSerializer на каждую строку достаёт атрибуты через get_attribute и
+вызывает to_representation каждого поля. Для списков это основная
+работа процессора. Здесь поля сериализатора один раз компилируются в
+функцию вида
+
+    def read(row):
+        return {"id": row["id"], "price": c2(row["price"]), ...}
+
+Значения, которые DRF отдаёт как есть (целые, строки, булевы, первичные
+ключи связей), копируются без вызовов; даты, время, Decimal и float в
+настройках по умолчанию преобразуются встроенными выражениями с теми же
+правилами. Для остальных вызывается to_representation того же поля,
+поэтому ответ совпадает с сериализатором байт в байт. Для
+SerializerMethodField нужно описание в values_fields сериализатора:
+{поле: (колонка values(), функция)}. Сериализаторы с другими полями
+(вложенные, source="*", пути через точку) читаются как раньше.
+"""
+
+import decimal
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from . import metrics
+
+Reader = namedtuple("Reader", "columns read")
+
+# поля, чей to_representation для значения из БД ничего не меняет
+PASSTHROUGH = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _inherits(field, base):
+    return isinstance(field, base) and (
+        type(field).to_representation is base.to_representation
+    )
+
+
+def _iso_format(field, default):
+    output_format = getattr(field, "format", default)
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+def _datetime_converter(field, tz):
+    # то же, что DateTimeField.to_representation, но часовой пояс
+    # определён один раз на запрос
+    def convert(value):
+        if value.utcoffset() is None:
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(tz)
+        except OverflowError:
+            return field.to_representation(value)
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+def _converter(field, name, namespace, tz):
+    """Выражение от v для значения не None (v — значение колонки)."""
+    if any(_inherits(field, base) for base in PASSTHROUGH):
+        return None
+    if _inherits(field, serializers.FloatField):
+        return "float(v)"
+    if _inherits(field, serializers.DateField) and _iso_format(
+        field, api_settings.DATE_FORMAT
+    ):
+        return "v.isoformat()"
+    if (
+        _inherits(field, serializers.DateTimeField)
+        and _iso_format(field, api_settings.DATETIME_FORMAT)
+        and not hasattr(field, "timezone")
+        and tz is not None
+    ):
+        namespace[name] = _datetime_converter(field, tz)
+        return f"{name}(v)"
+    if (
+        _inherits(field, serializers.DecimalField)
+        and getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        and not field.localize
+        and not field.normalize_output
+        and field.decimal_places is not None
+    ):
+        # DecimalField.quantize копирует контекст на каждое значение
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        namespace[name] = (
+            decimal.Decimal(".1") ** field.decimal_places,
+            field.rounding,
+            context,
+        )
+        return (
+            f"format((v if v.__class__ is Decimal else Decimal(str(v).strip()))"
+            f".quantize(*{name}), 'f')"
+        )
+    namespace[name] = field.to_representation
+    return f"{name}(v)"
+
+
+def _column(field, model):
+    if field.source == "*" or "." in field.source:
+        raise Unsupported(field.field_name)
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        raise Unsupported(field.field_name)
+    if not model_field.concrete or model_field.many_to_many:
+        raise Unsupported(field.field_name)
+    if isinstance(field, serializers.RelatedField):
+        if not isinstance(field, serializers.PrimaryKeyRelatedField) or (
+            field.pk_field is not None
+        ):
+            raise Unsupported(field.field_name)
+    elif isinstance(field, serializers.BaseSerializer):
+        raise Unsupported(field.field_name)
+    return model_field.attname
+
+
+def compile_reader(serializer_class, tz=None, names=None):
+    """names — подмножество полей (core.sparse), None — все поля."""
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    values_fields = getattr(serializer_class, "values_fields", {})
+    columns = []
+    items = []
+    namespace = {"Decimal": decimal.Decimal}
+    for index, (name, field) in enumerate(serializer.fields.items()):
+        if field.write_only or (names is not None and name not in names):
+            continue
+        if name in values_fields:
+            # функция вызывается и для None, как метод сериализатора
+            column, namespace[f"c{index}"] = values_fields[name]
+            value = f"c{index}(row[{column!r}])"
+        elif isinstance(field, serializers.SerializerMethodField):
+            raise Unsupported(name)
+        else:
+            column = _column(field, model)
+            value = f"row[{column!r}]"
+            converter = _converter(field, f"c{index}", namespace, tz)
+            if converter is not None:
+                value = f"(None if (v := {value}) is None else {converter})"
+        columns.append(column)
+        items.append(f"{name!r}: {value}")
+    source = "def read(row):\n    return {%s}\n" % ", ".join(items)
+    exec(source, namespace)
+    return Reader(tuple(dict.fromkeys(columns)), namespace["read"])
+
+
+@lru_cache(maxsize=256)
+def _reader(serializer_class, names, tz):
+    try:
+        return compile_reader(serializer_class, tz, names)
+    except Unsupported:
+        return None
+
+
+def reader_for(serializer_class, names=None):
+    """Скомпилированное чтение для сериализатора или None."""
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    return _reader(serializer_class, names, tz)
+
+
+class ValuesListMixin:
+    """list на values() и compile_reader; ставится перед ConditionalMixin."""
+
+    def list_reader(self):
+        return reader_for(
+            self.get_serializer_class(), getattr(self, "sparse_fields", None)
+        )
+
+    def list_queryset(self, queryset):
+        reader = self.list_reader()
+        if reader is None:
+            return super().list_queryset(queryset)
+        # ключи пагинации и валидаторы ConditionalMixin читаются из тех же строк
+        ordering = [field.lstrip("-") for field in getattr(self, "ordering", ())]
+        return queryset.values(
+            *dict.fromkeys((*reader.columns, "id", self.version_field, *ordering))
+        )
+
+    def list_data(self, rows):
+        reader = self.list_reader()
+        if reader is None:
+            return super().list_data(rows)
+        return metrics.timed_serialize(lambda: [reader.read(row) for row in rows])
@@ -0,0 +1,120 @@
+"""Быстрый JSON на orjson и MessagePack для межсервисных клиентов.
+
+ORJSONRenderer отдаёт те же байты, что JSONRenderer DRF в настройках
+по умолчанию (компактно, UTF-8, \\u2028 и \\u2029 экранированы). Всё, что
+orjson не знает, и даты с временем проходят через JSONEncoder DRF, поэтому
+Decimal, date, datetime и ленивые строки выглядят как раньше. Отступы
+(?format=json с indent, браузерный API) рендерит родительский класс. Его же
+получают ответы с float вне [1e-4, 1e16): orjson пишет их иначе (1e-7
+вместо 1e-07), а NaN и бесконечность — как null, где DRF падает с ValueError.
+
+MessagePackRenderer и MessagePackParser выбираются по Accept и Content-Type
+application/msgpack. Значения кодируются так же, как в JSON: Decimal,
+даты и UUID — строками, поэтому клиент получает ту же структуру.
+
+orjson и msgpack необязательны: settings подключает классы, только если
+пакет установлен.
+"""
+
+import math
+import re
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+_default = JSONEncoder().default
+
+# в выводе orjson с особым float всегда есть одна из этих
+# последовательностей: null (NaN, inf), 1e-7, 1e16, 0.00001
+_special_float_output = re.compile(rb"null|\d[eE]|0\.0000")
+
+
+def _has_special_floats(data):
+    """Есть ли float, который json.dumps пишет не так, как orjson."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value) or (value and not 1e-4 <= abs(value) < 1e16):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    if orjson is not None:
+        options = (
+            orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_NON_STR_KEYS
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=self.options)
+        except orjson.JSONEncodeError as exc:
+            # как json.dumps: несериализуемое значение — TypeError
+            raise TypeError(str(exc)) from exc
+        if _special_float_output.search(ret) and _has_special_floats(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+def _msgpack_default(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return _default(value)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(
+            data, default=_msgpack_default, use_bin_type=True, datetime=False
+        )
+
+
+class MessagePackParser(BaseParser):
+    media_type = MSGPACK_MEDIA_TYPE
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f"Некорректный MessagePack: {exc}")
@@ -0,0 +1,213 @@
+"""Готовая схема OpenAPI для /api/schema/.
+
+SpectacularAPIView разбирает все viewset и сериализаторы на каждый запрос.
+Здесь схема строится один раз на версию кода: версия — хеш маршрутов API,
+настроек DRF и drf-spectacular и всех исходников проекта (схему меняют не
+только представления и сериализаторы, но и фильтры, пагинация, классы
+аутентификации и расширения OpenAPI). Готовые YAML и JSON лежат в SCHEMA_DIR под этой
+версией (``manage.py build_schema`` при выкладке), процесс читает их один раз
+и держит в памяти вместе со сжатой gzip копией и ETag. Изменение кода меняет
+версию, и схема строится заново.
+
+Запросы с параметрами, кроме format (lang, version, indent в Accept), отдаёт
+обычный SpectacularAPIView.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+from threading import Lock
+
+import drf_spectacular
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from drf_spectacular.generators import EndpointEnumerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+Variant = namedtuple("Variant", "body gzipped etag gzip_etag")
+
+_lock = Lock()
+_loaded = {}
+# (format, Accept, force) -> (рендерер, media type); разных Accept немного,
+# рендереры схемы не хранят состояния и годятся для любого запроса
+_negotiated = {}
+NEGOTIATED_MAX = 256
+
+
+def _source_files():
+    # сторонние пакеты учтены версиями DRF и drf-spectacular
+    for root, dirs, files in os.walk(settings.BASE_DIR):
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if not name.startswith(".")
+            and name != "__pycache__"
+            and not os.path.exists(os.path.join(root, name, "pyvenv.cfg"))
+        )
+        for name in sorted(files):
+            if name.endswith(".py"):
+                yield os.path.join(root, name)
+
+
+def schema_version():
+    digest = hashlib.sha256()
+    for part in (
+        drf_spectacular.__version__,
+        rest_framework.VERSION,
+        repr(settings.SPECTACULAR_SETTINGS),
+        repr(settings.REST_FRAMEWORK),
+    ):
+        digest.update(part.encode())
+    for path, _, method, callback in EndpointEnumerator().get_api_endpoints():
+        view = callback.cls
+        digest.update(f"{method} {path} {view.__module__}.{view.__qualname__}".encode())
+    for path in _source_files():
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _accepts_gzip(header):
+    """gzip допустим по Accept-Encoding; q=0 — явный отказ (RFC 9110)."""
+    weights = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def _path(version, file_format):
+    return Path(settings.SCHEMA_DIR) / f"openapi-{version}.{file_format}"
+
+
+def build(version):
+    """Строит схему и записывает все форматы; возвращает {формат: байты}."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(
+        request=None, public=spectacular_settings.SERVE_PUBLIC
+    )
+    directory = Path(settings.SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    bodies = {}
+    for file_format, renderer_class in RENDERERS.items():
+        renderer = renderer_class()
+        body = renderer.render(schema, renderer.media_type, {})
+        # запись через временный файл: другой воркер не прочитает половину
+        fd, temporary = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "wb") as file:
+            file.write(body)
+        os.replace(temporary, _path(version, file_format))
+        bodies[file_format] = body
+    for stale in directory.glob("openapi-*"):
+        if not stale.name.startswith(f"openapi-{version}."):
+            stale.unlink(missing_ok=True)
+    return bodies
+
+
+def _filename(renderer):
+    # имя файла как у SpectacularAPIView; версии API у готовой схемы нет
+    return f"{spectacular_settings.TITLE or 'schema'}.{renderer.format}"
+
+
+def _variant(body):
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return Variant(
+        body,
+        gzip.compress(body, compresslevel=9, mtime=0),
+        quote_etag(digest),
+        quote_etag(f"{digest}-gzip"),
+    )
+
+
+def variants():
+    """{формат: Variant} текущей версии; схема строится, только если файлов нет."""
+    if _loaded:
+        return _loaded
+    with _lock:
+        if not _loaded:
+            version = schema_version()
+            try:
+                bodies = {
+                    file_format: _path(version, file_format).read_bytes()
+                    for file_format in RENDERERS
+                }
+            except FileNotFoundError:
+                bodies = build(version)
+            _loaded.update(
+                (file_format, _variant(body)) for file_format, body in bodies.items()
+            )
+    return _loaded
+
+
+class CachedSchemaView(SpectacularAPIView):
+    # схема публичная: ни сессии, ни пользователя не читаем
+    authentication_classes = []
+
+    def _cacheable(self, request):
+        return not (
+            self.urlconf
+            or self.patterns
+            or self.custom_settings
+            or self.api_version
+            or request.version
+            or request.query_params.keys() - {"format"}
+            or ";" in request.accepted_media_type
+        )
+
+    def perform_content_negotiation(self, request, force=False):
+        key = (
+            self.format_kwarg
+            or request.query_params.get(self.settings.URL_FORMAT_OVERRIDE),
+            request.META.get("HTTP_ACCEPT"),
+            force,
+        )
+        result = _negotiated.get(key)
+        if result is None:
+            result = super().perform_content_negotiation(request, force)
+            if len(_negotiated) < NEGOTIATED_MAX:
+                _negotiated[key] = result
+        return result
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if not self._cacheable(request):
+            return super().get(request, *args, **kwargs)
+        renderer = request.accepted_renderer
+        variant = variants()[renderer.format]
+        gzipped = _accepts_gzip(request.headers.get("Accept-Encoding", ""))
+        etag = variant.gzip_etag if gzipped else variant.etag
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f"; charset={renderer.charset}"
+            response = HttpResponse(
+                variant.gzipped if gzipped else variant.body,
+                content_type=content_type,
+            )
+            if gzipped:
+                response["Content-Encoding"] = "gzip"
+            response["Content-Disposition"] = (
+                f'inline; filename="{_filename(renderer)}"'
+            )
+        response["ETag"] = etag
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,10 +43,15 @@ INSTALLED_APPS = [
     "booking",
     "users",
     "drf_spectacular",
-    "django_extensions",
 ]
+# инструменты разработки — только при DEBUG и если установлены
+if DEBUG and find_spec("django_extensions"):
+    INSTALLED_APPS.append("django_extensions")
 
 MIDDLEWARE = [
+    "core.metrics.ServerTimingMiddleware",
+    "core.profiling.ProfilerMiddleware",
+    "core.db_router.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,6 +62,10 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = "core.urls"
+# под ASGI при ASYNC_VIEWS=1: те же маршруты, горячие GET — асинхронные
+# (core.async_views); по умолчанию ASGI обслуживает обычные представления
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS") == "1"
+ASGI_URLCONF = "core.urls_asgi"
 
 TEMPLATES = [
     {
@@ -78,13 +89,133 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# Постоянные соединения с проверкой перед запросом. Под ASGI каждый
+# запрос работает в своём потоке — там DB_CONN_MAX_AGE=0, а на
+# PostgreSQL лучше пул (POSTGRES_POOL=1, нужен psycopg[pool]).
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+# IMMEDIATE берёт блокировку записи в начале транзакции: иначе
+# «прочитать, потом записать» при конкурентной записи сразу падает
+# с database is locked, не дожидаясь busy_timeout.
+SQLITE_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA busy_timeout=5000;"
+        "PRAGMA mmap_size=134217728;"
+        "PRAGMA cache_size=-20000;"
+        "PRAGMA temp_store=MEMORY;"
+    ),
+}
+
+if os.environ.get("POSTGRES_DB"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ["POSTGRES_DB"],
+            "USER": os.environ.get("POSTGRES_USER", ""),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", ""),
+            "PORT": os.environ.get("POSTGRES_PORT", ""),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+    if os.environ.get("POSTGRES_POOL") == "1":
+        # пул несовместим с постоянными соединениями Django
+        DATABASES["default"]["OPTIONS"] = {"pool": True}
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": SQLITE_OPTIONS,
+        }
+    }
+
+# Реплики для чтения (core.db_router). Локально их изображают копии
+# файла основной БД: cp db.sqlite3 replica.sqlite3 и
+# SQLITE_REPLICAS=replica.sqlite3 — изменения после копирования реплика
+# не увидит, как при отставании репликации.
+for index, name in enumerate(
+    filter(None, os.environ.get("SQLITE_REPLICAS", "").split(",")), start=1
+):
+    DATABASES[f"replica{index}"] = {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": BASE_DIR / name,
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": SQLITE_OPTIONS,
+        "TEST": {"MIRROR": "default"},
     }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+# сколько секунд после записи чтения клиента идут в default
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # ответы PropertyViewSet: LRU по MAX_ENTRIES, TTL по TIMEOUT
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    # карты занятости (booking.occupancy); LocMem у каждого процесса свой,
+    # TIMEOUT ограничивает, как долго воркер не видит чужие брони
+    "occupancy": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "occupancy",
+        "TIMEOUT": 60,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    # пользователи по токенам API: короткий TTL ограничивает задержку отзыва
+    "auth": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "auth",
+        "TIMEOUT": 60,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
 }
 
+PROPERTY_CACHE_ALIAS = "responses"
+OCCUPANCY_CACHE_ALIAS = "occupancy"
+
+
+# Токены API (users.authentication)
+
+AUTH_CACHE_ALIAS = "auth"
+AUTH_TOKEN_MAX_AGE = 24 * 3600
+
+
+# Замеры запросов (core.metrics)
+
+SERVER_TIMING = True
+# /metrics требует Authorization: Bearer <токен>; без токена он открыт
+# только при DEBUG
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Профилирование запросов (core.profiling)
+
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED") == "1"
+# доля запросов, профилируемых без заголовка X-Profile
+PROFILER_SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", 0))
+PROFILER_TOKEN_MAX_AGE = 3600
+PROFILER_DIR = os.environ.get("PROFILER_DIR", BASE_DIR / "profiles")
+PROFILER_TOP = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -128,11 +259,40 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Форматы ответов (core.renderers): orjson и msgpack — если установлены;
+# FAST_JSON=0 возвращает JSONRenderer DRF
+API_RENDERERS = [
+    (
+        "core.renderers.ORJSONRenderer"
+        if find_spec("orjson") and os.environ.get("FAST_JSON", "1") == "1"
+        else "rest_framework.renderers.JSONRenderer"
+    ),
+    "rest_framework.renderers.BrowsableAPIRenderer",
+]
+API_PARSERS = [
+    "rest_framework.parsers.JSONParser",
+    "rest_framework.parsers.FormParser",
+    "rest_framework.parsers.MultiPartParser",
+]
+if find_spec("msgpack"):
+    API_RENDERERS.append("core.renderers.MessagePackRenderer")
+    API_PARSERS.append("core.renderers.MessagePackParser")
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": API_RENDERERS,
+    "DEFAULT_PARSER_CLASSES": API_PARSERS,
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        # без cookie сессии проверка сессии не обращается к БД
+        "rest_framework.authentication.SessionAuthentication",
+        "users.authentication.SignedTokenAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 
@@ -142,4 +302,6 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "0.0.1",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+# готовая схема по версиям кода (core.schema, manage.py build_schema)
+SCHEMA_DIR = os.environ.get("SCHEMA_DIR", BASE_DIR / "schema")
 AUTH_USER_MODEL = "users.User"
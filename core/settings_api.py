@@ -0,0 +1,45 @@
+"""Профиль API-воркера: DJANGO_SETTINGS_MODULE=core.settings_api.
+
+Те же БД, кэши, middleware и аутентификация, что в core.settings, но
+загружается только нужное для /api/v1/ и /metrics. Админку, сообщения,
+статику, браузерный API, схему OpenAPI и инструменты разработки
+обслуживают воркеры на core.settings. Замер холодного старта обоих
+профилей — ``manage.py bench startup``.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import API_RENDERERS, INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+        "drf_spectacular",
+        "django_extensions",
+    )
+]
+
+MIDDLEWARE = [
+    name
+    for name in MIDDLEWARE
+    if name != "django.contrib.messages.middleware.MessageMiddleware"
+]
+
+ROOT_URLCONF = "core.urls_api"
+ASGI_URLCONF = "core.urls_api_asgi"
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": [
+        name for name in API_RENDERERS if not name.endswith("BrowsableAPIRenderer")
+    ],
+    # extend_schema при импорте представлений наследует класс схемы:
+    # AutoSchema drf-spectacular тянет за собой генератор и django.test
+    "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.openapi.AutoSchema",
+}
@@ -0,0 +1,139 @@
+"""Выборочные поля ответа: ?fields=id,name и ?omit=description.
+
+Работает для действий из sparse_actions (list и retrieve). Сериализатор
+отдаёт только выбранные поля, а выборка из БД сужается вместе с ним:
+списки на core.readers читают values() только нужных колонок, остальные
+пути получают .only(). Большие текстовые колонки, которых нет в ответе,
+из БД не читаются.
+"""
+
+from functools import cache, cached_property, lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+CONTEXT_KEY = "sparse_fields"
+
+
+@cache
+def field_names(serializer_class):
+    return tuple(
+        name
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+@lru_cache(maxsize=256)
+def only_fields(serializer_class, names):
+    """Поля модели для .only() или None, если поле нельзя сопоставить с колонкой."""
+    model = serializer_class.Meta.model
+    fields = serializer_class().fields
+    only = []
+    for name in names:
+        field = fields[name]
+        if isinstance(field, serializers.SerializerMethodField):
+            # методы читают аннотации, а не колонки модели
+            continue
+        if field.source == "*" or "." in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        only.append(model_field.name)
+    return only
+
+
+class SparseFieldsParamsSerializer(serializers.Serializer):
+    fields = serializers.CharField(required=False)
+    omit = serializers.CharField(required=False)
+
+    def _split(self, value):
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(names) - set(self.context["choices"])
+        if unknown:
+            raise serializers.ValidationError(
+                f"Неизвестные поля: {', '.join(sorted(unknown))}."
+            )
+        return names
+
+    def validate_fields(self, value):
+        return self._split(value)
+
+    def validate_omit(self, value):
+        return self._split(value)
+
+    def validate(self, data):
+        names = data.get("fields", self.context["choices"])
+        omit = set(data.get("omit", ()))
+        # порядок полей — как в сериализаторе, а не как в запросе
+        return {
+            "names": tuple(
+                name
+                for name in self.context["choices"]
+                if name in names and name not in omit
+            )
+        }
+
+
+class SparseSerializerMixin:
+    """Оставляет поля из context["sparse_fields"], если он задан."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get(CONTEXT_KEY)
+        if names is None:
+            return fields
+        return {name: fields[name] for name in names}
+
+
+class SparseFieldsMixin:
+    sparse_actions = ("list", "retrieve")
+
+    @cached_property
+    def sparse_fields(self):
+        """Кортеж выбранных полей или None, если ответ полный."""
+        query_params = self.request.query_params
+        if self.action not in self.sparse_actions or not (
+            "fields" in query_params or "omit" in query_params
+        ):
+            return None
+        choices = field_names(self.get_serializer_class())
+        params = SparseFieldsParamsSerializer(
+            data=query_params, context={"choices": choices}
+        )
+        params.is_valid(raise_exception=True)
+        names = params.validated_data["names"]
+        return None if names == choices else names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.sparse_fields is not None:
+            context[CONTEXT_KEY] = self.sparse_fields
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.sparse_fields is None:
+            return queryset
+        only = only_fields(self.get_serializer_class(), self.sparse_fields)
+        if only is None:
+            return queryset
+        model = queryset.model
+        extra = [self.version_field]
+        for field in getattr(self, "ordering", ()):
+            # ключи пагинации; аннотации вроде search_rank не колонки
+            try:
+                extra.append(model._meta.get_field(field.lstrip("-")).name)
+            except FieldDoesNotExist:
+                pass
+        return queryset.only(*dict.fromkeys((*only, *extra)))
+
+    def etag_variant(self):
+        variant = super().etag_variant()
+        if self.sparse_fields is None:
+            return variant
+        return (*variant, ",".join(self.sparse_fields))
@@ -0,0 +1,11 @@
+"""Маршруты API без админки и схемы — ROOT_URLCONF профиля core.settings_api."""
+
+from django.urls import path, include
+
+from .metrics import metrics_view
+
+urlpatterns = [
+    path("api/", include("booking.urls")),
+    path("api/", include("users.urls")),
+    path("metrics", metrics_view, name="metrics"),
+]
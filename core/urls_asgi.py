@@ -0,0 +1,13 @@
+"""Маршруты ASGI-развёртывания: core.urls с async-версиями горячих GET."""
+
+from django.urls import include, path
+
+from booking.urls import router_v1
+
+from .async_views import async_patterns
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/v1/", include(async_patterns(router_v1.urls))),
+    *sync_urlpatterns,
+]
@@ -1,6 +1,12 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if apps.is_installed("drf_spectacular"):
+            from . import schema  # noqa: F401
@@ -0,0 +1,125 @@
+"""Подписанные токены API: Authorization: Bearer <токен>.
+
+Токен — подписанная SECRET_KEY строка "id:версия:отпечаток пароля"
+с меткой времени, его проверка не обращается к БД. Пользователь по id
+берётся из кэша процесса (AUTH_CACHE_ALIAS, короткий TTL) и читается из БД
+только при промахе. Сохранение или удаление пользователя убирает его из
+кэша (users.signals).
+
+revoke_tokens увеличивает token_version: все выданные ранее токены
+перестают действовать — в этом процессе сразу, в остальных воркерах
+не позже чем через TTL кэша. Так же их отзывает смена пароля: отпечаток —
+HMAC хеша пароля, как хеш сессии в django.contrib.auth.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.db.models import F
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+SALT = "users.authentication"
+
+
+def _cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def _user_key(pk):
+    return f"auth:user:{pk}"
+
+
+def _password_mark(user):
+    return salted_hmac(SALT, user.password, algorithm="sha256").hexdigest()[:16]
+
+
+def make_token(user):
+    signer = signing.TimestampSigner(salt=SALT)
+    return signer.sign(f"{user.pk}:{user.token_version}:{_password_mark(user)}")
+
+
+def verify_token(token):
+    """(id, версия токенов, отпечаток пароля) или AuthenticationFailed."""
+    signer = signing.TimestampSigner(salt=SALT)
+    try:
+        value = signer.unsign(token, max_age=settings.AUTH_TOKEN_MAX_AGE)
+        pk, version, mark = value.split(":")
+        pk, version = int(pk), int(version)
+    except signing.SignatureExpired:
+        raise AuthenticationFailed("Срок действия токена истёк.")
+    except (signing.BadSignature, ValueError):
+        raise AuthenticationFailed("Недействительный токен.")
+    return pk, version, mark
+
+
+def forget_user(pk):
+    _cache().delete(_user_key(pk))
+
+
+def revoke_tokens(user):
+    get_user_model().objects.filter(pk=user.pk).update(
+        token_version=F("token_version") + 1
+    )
+    forget_user(user.pk)
+    user.refresh_from_db(fields=["token_version"])
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    keyword = "Bearer"
+
+    def _token(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Некорректный заголовок Authorization.")
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed("Недействительный токен.")
+
+    def _check(self, user, version, mark):
+        if (
+            user is None
+            or not user.is_active
+            or user.token_version != version
+            or not constant_time_compare(_password_mark(user), mark)
+        ):
+            raise AuthenticationFailed("Токен отозван.")
+        return user
+
+    def authenticate(self, request):
+        token = self._token(request)
+        if token is None:
+            return None
+        pk, version, mark = verify_token(token)
+        user = _cache().get(_user_key(pk))
+        if user is None:
+            user = get_user_model().objects.filter(pk=pk).first()
+            if user is not None:
+                _cache().set(_user_key(pk), user)
+        return self._check(user, version, mark), token
+
+    async def aauthenticate(self, request):
+        # для core.async_views; LocMemCache читаем прямо из цикла событий,
+        # сетевой кэш — в потоке
+        if not isinstance(_cache(), LocMemCache):
+            return await sync_to_async(self.authenticate)(request)
+        token = self._token(request)
+        if token is None:
+            return None
+        pk, version, mark = verify_token(token)
+        user = _cache().get(_user_key(pk))
+        if user is None:
+            user = await get_user_model().objects.filter(pk=pk).afirst()
+            if user is not None:
+                _cache().set(_user_key(pk), user)
+        return self._check(user, version, mark), token
+
+    def authenticate_header(self, request):
+        return self.keyword
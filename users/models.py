@@ -4,6 +4,14 @@ from django.db import models
 
 class User(AbstractUser):
     is_owner = models.BooleanField(default=False, verbose_name="Владелец жилья")
+    updated_at = models.DateTimeField(auto_now=True)
+    # увеличение отзывает все выданные токены API (users.authentication)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["date_joined", "id"], name="user_joined_idx"),
+        ]
 
     def __str__(self):
         return self.username
@@ -0,0 +1,17 @@
+"""Описание токенов API для drf-spectacular.
+
+Загружается из UsersConfig.ready, только если drf_spectacular установлен
+в INSTALLED_APPS: профилю API-воркера (core.settings_api) схема не нужна.
+"""
+
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+
+from .authentication import SignedTokenAuthentication
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    target_class = SignedTokenAuthentication
+    name = "tokenAuth"
+
+    def get_security_definition(self, auto_schema):
+        return {"type": "http", "scheme": "bearer"}
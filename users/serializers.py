@@ -1,9 +1,29 @@
+from django.contrib.auth import authenticate
 from rest_framework import serializers
+
+from core.metrics import TimedListSerializer, TimedSerializerMixin
+
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
         fields = ["id", "username", "email"]
+        list_serializer_class = TimedListSerializer
+
+
+class TokenSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(write_only=True, style={"input_type": "password"})
+
+    def validate(self, data):
+        user = authenticate(
+            self.context["request"],
+            username=data["username"],
+            password=data["password"],
+        )
+        if user is None:
+            raise serializers.ValidationError("Неверное имя пользователя или пароль.")
+        return {"user": user}
@@ -1,8 +1,14 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from booking.models import Property
+from users.authentication import make_token
+
 User = get_user_model()
 
 
@@ -27,15 +33,15 @@ class UserViewSetTests(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get("/api/v1/users/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["username"], self.user.username)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["username"], self.user.username)
 
     def test_get_users_list_as_admin(self):
         """Администратор должен видеть всех пользователей"""
         self.client.force_authenticate(user=self.superuser)
         response = self.client.get("/api/v1/users/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 2)
+        self.assertGreaterEqual(len(response.data["results"]), 2)
 
     def test_get_user_detail(self):
         """Пользователь должен видеть только свой профиль"""
@@ -59,3 +65,129 @@ class UserViewSetTests(TestCase):
         response = self.client.delete(f"/api/v1/users/{self.user.id}/")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(User.objects.filter(id=self.user.id).exists())
+
+    def test_conditional_get_users(self):
+        """Повторный запрос с ETag не перечитывает профиль целиком"""
+        self.client.force_authenticate(user=self.user)
+        url = f"/api/v1/users/{self.user.id}/"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = self.client.get("/api/v1/users/")["ETag"]
+        response = self.client.get("/api/v1/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {"email": "new@example.com"})
+        response = self.client.get("/api/v1/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        for backend in caches.all():
+            backend.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="owner", password="ownerpass")
+        self.property = Property.objects.create(
+            name="Token Property",
+            description="Token",
+            property_type="apartment",
+            address="1 Street",
+            city="Token City",
+            country="Test Country",
+            owner=self.user,
+            price_per_night=100,
+            max_guests=2,
+            bedrooms=1,
+            bathrooms=1,
+        )
+
+    def authorize(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_obtain_token(self):
+        """Токен выдаётся по паролю и открывает доступ к API"""
+        response = self.client.post(
+            "/api/v1/auth/token/", {"username": "owner", "password": "wrong"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            "/api/v1/auth/token/", {"username": "owner", "password": "ownerpass"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.authorize(response.data["token"])
+        response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.data["results"][0]["username"], "owner")
+
+    def test_warm_request_without_auth_queries(self):
+        """Повторный запрос с токеном не читает ни пользователя, ни сессию"""
+        self.authorize(make_token(self.user))
+        url = f"/api/v1/properties/{self.property.id}/"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.patch(url, {"name": "Renamed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in captured:
+            self.assertNotIn("users_user", query["sql"])
+            self.assertNotIn("django_session", query["sql"])
+
+    def test_owner_check(self):
+        """Изменять жильё может только владелец"""
+        other = User.objects.create_user(username="other", password="otherpass")
+        self.authorize(make_token(other))
+        response = self.client.patch(
+            f"/api/v1/properties/{self.property.id}/", {"name": "Stolen"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_revoke_tokens(self):
+        """Отзыв и отключение пользователя действуют сразу"""
+        token = make_token(self.user)
+        self.authorize(token)
+        self.assertEqual(
+            self.client.get("/api/v1/users/").status_code, status.HTTP_200_OK
+        )
+        response = self.client.post("/api/v1/auth/revoke/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.refresh_from_db()
+        self.authorize(make_token(self.user))
+        self.assertEqual(
+            self.client.get("/api/v1/users/").status_code, status.HTTP_200_OK
+        )
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_revokes_tokens(self):
+        """Смена пароля отзывает выданные токены, как и сессии"""
+        self.authorize(make_token(self.user))
+        self.assertEqual(
+            self.client.get("/api/v1/users/").status_code, status.HTTP_200_OK
+        )
+        self.user.set_password("newpass")
+        self.user.save()
+        response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.authorize(make_token(self.user))
+        self.assertEqual(
+            self.client.get("/api/v1/users/").status_code, status.HTTP_200_OK
+        )
+
+    def test_invalid_token(self):
+        """Подделанный и просроченный токены отклоняются"""
+        self.authorize(make_token(self.user) + "x")
+        response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.authorize(make_token(self.user))
+        with override_settings(AUTH_TOKEN_MAX_AGE=-1):
+            response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import UserViewSet
+from .views import RevokeTokensView, TokenView, UserViewSet
 
 router_v1 = DefaultRouter()
 router_v1.register("users", UserViewSet)
 
 urlpatterns = [
+    path("v1/auth/token/", TokenView.as_view(), name="auth-token"),
+    path("v1/auth/revoke/", RevokeTokensView.as_view(), name="auth-revoke"),
     path("v1/", include(router_v1.urls)),
 ]
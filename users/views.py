@@ -1,16 +1,54 @@
+from django.conf import settings
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+
+from core.conditional import ConditionalMixin
+from .authentication import make_token, revoke_tokens
 from .models import User
-from .serializers import UserSerializer
+from .serializers import TokenSerializer, UserSerializer
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ConditionalMixin, ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    ordering = ("-date_joined", "-id")
 
     def get_queryset(self):
         if self.request.user.is_superuser:
             return User.objects.all()
         else:
             return User.objects.filter(id=self.request.user.id)
+
+
+class TokenView(APIView):
+    """Выдаёт токен API по имени пользователя и паролю."""
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @extend_schema(request=TokenSerializer, responses={200: dict})
+    def post(self, request):
+        serializer = TokenSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {
+                "token": make_token(serializer.validated_data["user"]),
+                "expires_in": settings.AUTH_TOKEN_MAX_AGE,
+            }
+        )
+
+
+class RevokeTokensView(APIView):
+    """Отзывает все токены текущего пользователя."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(request=None, responses={204: None})
+    def post(self, request):
+        revoke_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)